@@ -0,0 +1,31 @@
+"""Настройки py.test для всего репозитория.
+
+pytest-django загружает yatube.settings раньше любого conftest.py,
+поэтому, если хранилище метрик не задано через YATUBE_METRICS_STORE
+(как в CI), оно переносится во временный каталог здесь: тесты не пишут
+в файл рабочего сервера и в дерево исходников.
+"""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+_metrics_dir = None
+
+
+def pytest_configure(config):
+    global _metrics_dir
+    if os.environ.get('YATUBE_METRICS_STORE'):
+        return
+    _metrics_dir = tempfile.mkdtemp()
+    settings.METRICS_STORE = os.path.join(_metrics_dir, 'metrics.sqlite3')
+
+
+def pytest_unconfigure(config):
+    if _metrics_dir is None:
+        return
+    # Иначе остаток приращений сбросится при выходе в удалённый каталог.
+    from core import metrics_store
+    metrics_store.flush()
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
@@ -0,0 +1,233 @@
+"""Кэш Django в файле SQLite, общий для всех процессов одной машины.
+
+В отличие от LocMemCache копии страниц, счётчики и версии областей кэша
+видят все воркеры сервера, поэтому сброс в одном процессе сразу доходит
+до остальных. Каждая запись — атомарная транзакция SQLite в режиме WAL,
+при переполнении вытесняются давно не читавшиеся ключи (приближённый
+LRU). Внешний сервис не нужен.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA_SQL = (
+    """CREATE TABLE IF NOT EXISTS cache (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL
+    ) WITHOUT ROWID""",
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+# Время чтения ключа обновляется не чаще раза в секунду: иначе каждое
+# попадание в кэш было бы записью и ждало блокировку базы.
+ACCESS_RESOLUTION = 1.0
+# Размер таблицы проверяется раз в столько записей одного процесса.
+CULL_EVERY = 64
+
+# Списки ключей в IN (...) идут пачками: SQLite до 3.32 принимает
+# не больше 999 параметров в запросе, а к ключам добавляется время.
+KEYS_PER_QUERY = 500
+
+SQLITE_INT_MIN, SQLITE_INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _encode(value):
+    # Целые хранятся как INTEGER, остальное — pickle.
+    if type(value) is int and SQLITE_INT_MIN <= value <= SQLITE_INT_MAX:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+def _placeholders(values):
+    return ', '.join('?' * len(values))
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), KEYS_PER_QUERY):
+        yield values[start:start + KEYS_PER_QUERY]
+
+
+@contextmanager
+def _immediate(connection):
+    """Транзакция, сразу берущая блокировку записи."""
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        connection.execute('ROLLBACK')
+        raise
+    connection.execute('COMMIT')
+
+
+class SQLiteCache(BaseCache):
+    """Бэкенд кэша; LOCATION — путь к файлу базы.
+
+    Соединение открывается своё у каждого потока и процесса, поэтому
+    кэш можно создать до fork воркеров.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self._path, timeout=30,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA_SQL:
+                connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = pid
+        return self._local.connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        if not names:
+            return {}
+        now = time.time()
+        connection = self._connection()
+        rows = []
+        for chunk in _chunks(names):
+            rows += connection.execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({_placeholders(chunk)}) AND {ALIVE}',
+                (*chunk, now),
+            ).fetchall()
+        stale = [key for key, _, accessed in rows
+                 if now - accessed > ACCESS_RESOLUTION]
+        for chunk in _chunks(stale):
+            connection.execute(
+                f'UPDATE cache SET accessed = ? '
+                f'WHERE key IN ({_placeholders(chunk)})',
+                (now, *chunk),
+            )
+        return {names[key]: _decode(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = [(self._key(key, version), _encode(value), expires, now)
+                for key, value in data.items()]
+        connection = self._connection()
+        with _immediate(connection):
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)', rows,
+            )
+            self._maybe_cull(connection, now, len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        connection = self._connection()
+        with _immediate(connection):
+            connection.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, now),
+            )
+            added = connection.execute(
+                'INSERT OR IGNORE INTO cache (key, value, expires, accessed) '
+                'VALUES (?, ?, ?, ?)',
+                (key, _encode(value), self.get_backend_timeout(timeout), now),
+            ).rowcount == 1
+            if added:
+                self._maybe_cull(connection, now, 1)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        connection = self._connection()
+        with _immediate(connection):
+            row = connection.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {ALIVE}',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = _decode(row[0]) + delta
+            connection.execute('UPDATE cache SET value = ? WHERE key = ?',
+                               (_encode(value), key))
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        ).rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._connection().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        for chunk in _chunks(keys):
+            self._connection().execute(
+                f'DELETE FROM cache WHERE key IN ({_placeholders(chunk)})',
+                chunk,
+            )
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def _maybe_cull(self, connection, now, written):
+        before = self._writes
+        self._writes += written
+        if before // CULL_EVERY == self._writes // CULL_EVERY:
+            return
+        connection.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            connection.execute('DELETE FROM cache')
+            return
+        excess = (count - self._max_entries
+                  + self._max_entries // self._cull_frequency)
+        connection.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (excess,),
+        )
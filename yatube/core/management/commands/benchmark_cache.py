@@ -0,0 +1,124 @@
+import itertools
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache import SQLiteCache
+
+BACKENDS = {
+    'locmem': lambda location, params: LocMemCache('benchmark', params),
+    'sqlite': lambda location, params: SQLiteCache(location, params),
+}
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+def run_worker(backend, location, options, truth, seed, results):
+    """Читает «страницы» с версией области, как кэш списков постов.
+
+    truth — общая для процессов версия данных: с долей write_ratio
+    процесс меняет данные и сбрасывает кэш, остальные операции читают
+    страницу и при промахе «рендерят» её заново. Попадание в копию,
+    отрендеренную до последнего изменения, считается устаревшим.
+    """
+    cache = BACKENDS[backend](
+        location, {'OPTIONS': {'MAX_ENTRIES': options['max_entries']}})
+    rnd = random.Random(seed)
+    weights = list(
+        itertools.accumulate(
+            1 / (rank + 1) for rank in range(options['keys'])))
+    payload = b'x' * options['size']
+    cache.add('version', 0, None)
+    hits = misses = stale = 0
+    timings = []
+    for _ in range(options['ops']):
+        if rnd.random() < options['write_ratio']:
+            with truth.get_lock():
+                truth.value += 1
+            try:
+                cache.incr('version')
+            except ValueError:
+                cache.add('version', 0, None)
+            continue
+        page = rnd.choices(range(options['keys']), cum_weights=weights)[0]
+        started = time.perf_counter()
+        key = f'page:{page}:{cache.get("version", 0)}'
+        cached = cache.get(key)
+        if cached is None:
+            misses += 1
+            cache.set(key, (truth.value, payload), None)
+        else:
+            hits += 1
+            stale += cached[0] < truth.value
+        timings.append(time.perf_counter() - started)
+    results.put((hits, misses, stale, timings))
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает долю попаданий, устаревших попаданий и задержку '
+            'LocMemCache и общего SQLiteCache при работе N процессов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, nargs='+',
+                            default=[1, 2, 4])
+        parser.add_argument('--ops', type=int, default=5000,
+                            help='Операций на процесс.')
+        parser.add_argument('--keys', type=int, default=200,
+                            help='Число разных страниц.')
+        parser.add_argument('--size', type=int, default=20000,
+                            help='Размер страницы в байтах.')
+        parser.add_argument('--write-ratio', type=float, default=0.01,
+                            help='Доля операций, меняющих данные.')
+        parser.add_argument('--max-entries', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        for processes in options['processes']:
+            for backend in BACKENDS:
+                directory = tempfile.mkdtemp()
+                try:
+                    self.run(context, backend, processes, options,
+                             os.path.join(directory, 'cache.sqlite3'))
+                finally:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+    def run(self, context, backend, processes, options, location):
+        truth = context.Value('q', 0)
+        results = context.Queue()
+        workers = [
+            context.Process(target=run_worker, args=(
+                backend, location, options, truth, seed, results))
+            for seed in range(processes)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        collected = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        hits = sum(result[0] for result in collected)
+        misses = sum(result[1] for result in collected)
+        stale = sum(result[2] for result in collected)
+        timings = sorted(t for result in collected for t in result[3])
+        reads = hits + misses
+        self.stdout.write(self.style.SUCCESS(
+            f'{backend} x{processes}: hit {hits / reads:.1%}, '
+            f'stale {stale / reads:.1%}, '
+            f'{processes * options["ops"] / elapsed:.0f} ops/s'
+        ))
+        self.stdout.write(
+            f'    p50 {statistics.median(timings) * 1e6:.0f} us, '
+            f'p95 {percentile(timings, 0.95) * 1e6:.0f} us, '
+            f'p99 {percentile(timings, 0.99) * 1e6:.0f} us'
+        )
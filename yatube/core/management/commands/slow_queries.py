@@ -0,0 +1,108 @@
+import glob
+import json
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Списки IN (%s, %s, ...) разной длины — один и тот же запрос.
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+# «SCAN таблица» без USING INDEX — просмотр всей таблицы.
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?! USING)(?:$| )')
+
+
+def fingerprint(sql):
+    sql = ' '.join(sql.split())
+    return NUMBER.sub('N', IN_LIST.sub('IN (...)', sql))
+
+
+def read_records(path):
+    """Записи журнала и его ротированных копий, от старых к новым."""
+    paths = sorted(glob.glob(f'{glob.escape(path)}.*'), reverse=True)
+    for name in [*paths, path]:
+        try:
+            with open(name, encoding='utf-8') as stream:
+                for line in stream:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def plan_warnings(plan):
+    """Признаки недостающего индекса в плане SQLite."""
+    warnings = []
+    for line in plan:
+        line = line.strip()
+        match = FULL_SCAN.match(line)
+        if match:
+            warnings.append(f'полный просмотр {match.group(1)}')
+        if line.startswith('USE TEMP B-TREE'):
+            warnings.append(f'сортировка без индекса ({line})')
+    return warnings
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных SQL-запросов: запросы, сгруппированные '
+            'без учёта значений, с числом, временем, представлениями, '
+            'местами вызова, планом и признаками недостающих индексов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_QUERY_LOG,
+                            help='Файл журнала; ротированные копии '
+                                 '(.1, .2, ...) читаются тоже.')
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--sort', default='total',
+                            choices=('total', 'max', 'avg', 'count'))
+
+    def handle(self, *args, **options):
+        groups = {}
+        for record in read_records(options['log']):
+            group = groups.setdefault(fingerprint(record['sql']), {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'sql': record['sql'],
+                'plan': [], 'sources': Counter(), 'locations': Counter(),
+            })
+            group['count'] += 1
+            group['total'] += record['duration_ms']
+            group['sources'][record.get('source')] += 1
+            group['locations'][record.get('location')] += 1
+            if record['duration_ms'] >= group['max']:
+                group['max'] = record['duration_ms']
+                group['sql'] = record['sql']
+                group['plan'] = record.get('plan') or []
+        if not groups:
+            raise CommandError(f'В журнале {options["log"]} нет записей.')
+
+        def key(group):
+            if options['sort'] == 'avg':
+                return group['total'] / group['count']
+            return group[options['sort']]
+
+        worst = sorted(groups.values(), key=key, reverse=True)
+        for number, group in enumerate(worst[:options['limit']], 1):
+            self.report(number, group)
+
+    def report(self, number, group):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{number}. Выполнений: {group["count"]}, '
+            f'всего {group["total"]:.1f} мс, '
+            f'в среднем {group["total"] / group["count"]:.1f} мс, '
+            f'максимум {group["max"]:.1f} мс'
+        ))
+        self.stdout.write(f'   {IN_LIST.sub("IN (...)", group["sql"])}')
+        for title, counter in (('Откуда', group['sources']),
+                               ('Где', group['locations'])):
+            common = ', '.join(f'{name} ({count})'
+                               for name, count in counter.most_common(3))
+            self.stdout.write(f'   {title}: {common}')
+        if group['plan']:
+            self.stdout.write('   План:')
+            for line in group['plan']:
+                self.stdout.write(f'     {line}')
+        for warning in plan_warnings(group['plan']):
+            self.stdout.write(self.style.WARNING(
+                f'   Возможно, не хватает индекса: {warning}'))
@@ -0,0 +1,76 @@
+"""Замер памяти, выделенной во время запроса, через tracemalloc.
+
+tracemalloc замедляет выделение памяти в разы, поэтому включается
+только настройкой MEMORY_PROFILING (или переменной PYTHONTRACEMALLOC)
+и в тестах бюджетов памяти. Трассировка общая для всех потоков
+процесса: замеры точны, когда сервер обрабатывает один запрос за раз.
+
+Пик сбрасывается tracemalloc.reset_peak(), которого до Python 3.9 нет:
+там вместо пика берётся наибольший уровень памяти на входе и выходе
+самого блока и вложенных в него блоков, то есть оценка снизу.
+"""
+import tracemalloc
+
+from django.conf import settings
+
+# Открытые блоки MemoryUsage: сброс пика во вложенном блоке не должен
+# терять пик, уже набранный внешними.
+_active = []
+
+
+def _traced_peak():
+    current, peak = tracemalloc.get_traced_memory()
+    return peak if hasattr(tracemalloc, 'reset_peak') else current
+
+
+def _note_peak(peak):
+    for usage in _active:
+        usage._peak = max(usage._peak, peak)
+
+
+def start():
+    """Включает tracemalloc; True, если включили именно здесь."""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(settings.MEMORY_TRACE_FRAMES)
+    return True
+
+
+class MemoryUsage:
+    """Контекстный менеджер: пик и остаток выделенной за блок памяти.
+
+    peak — максимум памяти сверх уровня на входе в блок, retained —
+    сколько из неё осталось занятым на выходе. Без трассировки оба
+    значения None. Блоки можно вкладывать: пик вложенного блока
+    учитывается и во внешних.
+    """
+
+    def __init__(self):
+        self.peak = None
+        self.retained = None
+
+    def __enter__(self):
+        self._tracing = tracemalloc.is_tracing()
+        if self._tracing:
+            _note_peak(_traced_peak())
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            self._start = self._peak = tracemalloc.get_traced_memory()[0]
+            _active.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._tracing:
+            _note_peak(_traced_peak())
+            _active.remove(self)
+            current = tracemalloc.get_traced_memory()[0]
+            self.peak = self._peak - self._start
+            self.retained = current - self._start
+
+
+def format_bytes(size):
+    for unit in ('Б', 'КБ'):
+        if abs(size) < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.1f} МБ'
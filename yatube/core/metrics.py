@@ -0,0 +1,229 @@
+"""Метрики производительности запросов по представлениям.
+
+PerformanceMiddleware собирает для каждого запроса число и время
+SQL-запросов, время рендеринга шаблонов, попадания и промахи кэша и
+общее время (и пик памяти, если включён MEMORY_PROFILING, см.
+core.memory), а затем складывает их в накопленные за жизнь процесса
+суммы по имени представления (например, ``posts:index``). Времена
+вложены друг в друга: SQL и обращения к кэшу из шаблона входят и во
+время шаблона.
+
+Те же данные уходят в общее для процессов хранилище metrics_store:
+гистограммы времени ответа и числа запросов, а чтения кэша — по
+областям из settings.METRICS_CACHE_AREAS.
+"""
+import functools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metrics_store
+
+FIELDS = ('requests', 'total_time', 'sql_count', 'sql_time',
+          'template_time', 'cache_hits', 'cache_misses', 'cache_time')
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}
+
+_MISSING = object()
+
+
+class RequestStats:
+    """Метрики одного запроса."""
+
+    def __init__(self):
+        # Имя представления, известно после разбора URL.
+        self.view = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        # {(область, 'hit' или 'miss'): число чтений}
+        self.cache_areas = Counter()
+        # Пик памяти за запрос в байтах, если включён MEMORY_PROFILING.
+        self.memory_peak = None
+        # Флаги вложенных вызовов, чтобы не считать их дважды.
+        self.in_template = False
+        self.in_cache = False
+
+    def server_timing(self, total_time):
+        """Значение заголовка Server-Timing; длительности в мс."""
+        entries = [
+            f'sql;dur={self.sql_time * 1000:.2f};'
+            f'desc="{self.sql_count} queries"',
+            f'template;dur={self.template_time * 1000:.2f}',
+            f'cache;dur={self.cache_time * 1000:.2f};'
+            f'desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+            f'total;dur={total_time * 1000:.2f}',
+        ]
+        if self.memory_peak is not None:
+            entries.append(f'mem;desc="peak {self.memory_peak} bytes"')
+        return ', '.join(entries)
+
+
+def current():
+    """Метрики запроса, который обрабатывает этот поток, или None."""
+    return getattr(_local, 'stats', None)
+
+
+@contextmanager
+def collecting():
+    stats = _local.stats = RequestStats()
+    try:
+        yield stats
+    finally:
+        _local.stats = None
+
+
+def record(view_name, stats, total_time):
+    """Добавляет метрики запроса к суммам его представления."""
+    with _lock:
+        totals = _totals.setdefault(view_name, dict.fromkeys(FIELDS, 0))
+        totals['requests'] += 1
+        totals['total_time'] += total_time
+        for field in FIELDS[2:]:
+            totals[field] += getattr(stats, field)
+        if stats.memory_peak is not None:
+            totals['memory_peak'] = max(totals.get('memory_peak', 0),
+                                        stats.memory_peak)
+    metrics_store.observe('yatube_request_duration_seconds', total_time,
+                          view=view_name)
+    metrics_store.observe('yatube_request_queries', stats.sql_count,
+                          view=view_name)
+    metrics_store.inc('yatube_sql_duration_seconds_total', stats.sql_time,
+                      view=view_name)
+    metrics_store.inc('yatube_template_duration_seconds_total',
+                      stats.template_time, view=view_name)
+    if stats.memory_peak is not None:
+        metrics_store.observe('yatube_request_memory_peak_bytes',
+                              stats.memory_peak, view=view_name)
+    for (area, result), count in stats.cache_areas.items():
+        metrics_store.inc('yatube_cache_requests_total', count, area=area,
+                          result=result)
+
+
+def snapshot():
+    """Копия накопленных сумм: {имя представления: {поле: значение}}.
+    memory_peak — не сумма, а наибольший пик памяти представления."""
+    with _lock:
+        return {view: dict(totals) for view, totals in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _totals.clear()
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Обёртка для connection.execute_wrapper."""
+    stats = current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_count += 1
+        stats.sql_time += time.perf_counter() - started
+
+
+def instrument_templates():
+    """Оборачивает рендеринг шаблонов бэкенда Django, один раз."""
+    from django.template.backends.django import Template
+
+    render = Template.render
+    if getattr(render, 'instrumented', False):
+        return
+
+    @functools.wraps(render)
+    def timed_render(self, context=None, request=None):
+        stats = current()
+        if stats is None or stats.in_template:
+            return render(self, context, request)
+        stats.in_template = True
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            stats.template_time += time.perf_counter() - started
+            stats.in_template = False
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+def cache_area(key):
+    """Область кэша по префиксу ключа."""
+    for prefix, area in settings.METRICS_CACHE_AREAS:
+        if key.startswith(prefix):
+            return area
+    return 'other'
+
+
+def _count_read(stats, key, hit):
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+    stats.cache_areas[cache_area(str(key)), 'hit' if hit else 'miss'] += 1
+
+
+@contextmanager
+def _cache_call(stats):
+    stats.in_cache = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.cache_time += time.perf_counter() - started
+        stats.in_cache = False
+
+
+def _instrument_cache(cache):
+    """Подменяет get и get_many экземпляра кэша. Попадания считаются
+    только для внешнего вызова, а не для get_many внутри get и
+    наоборот."""
+    get, get_many = cache.get, cache.get_many
+
+    def counted_get(key, default=None, version=None):
+        stats = current()
+        if stats is None or stats.in_cache:
+            return get(key, default, version)
+        with _cache_call(stats):
+            value = get(key, _MISSING, version)
+        _count_read(stats, key, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def counted_get_many(keys, version=None):
+        stats = current()
+        if stats is None or stats.in_cache:
+            return get_many(keys, version)
+        keys = list(keys)
+        with _cache_call(stats):
+            values = get_many(keys, version)
+        for key in dict.fromkeys(keys):
+            _count_read(stats, key, key in values)
+        return values
+
+    cache.get = counted_get
+    cache.get_many = counted_get_many
+    cache.instrumented = True
+
+
+def instrument_caches():
+    """Оборачивает get и get_many кэшей текущего потока.
+
+    Экземпляры кэшей у каждого потока свои, поэтому проверка идёт на
+    каждом запросе, а обёртка ставится один раз на экземпляр.
+    """
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if not getattr(cache, 'instrumented', False):
+            _instrument_cache(cache)
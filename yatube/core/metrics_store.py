@@ -0,0 +1,227 @@
+"""Метрики в формате Prometheus, общие для всех процессов машины.
+
+Каждый процесс копит приращения счётчиков и гистограмм в памяти и раз
+в METRICS_FLUSH_INTERVAL секунд прибавляет их к строкам файла SQLite
+(settings.METRICS_STORE) одной транзакцией. Страница /metrics/ читает
+файл, поэтому видит сумму по всем воркерам сервера и воркерам
+миниатюр. Счётчики переживают перезапуск процессов и только растут,
+как и ждёт Prometheus.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+UPLOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+                  300.0)
+MEMORY_BUCKETS = tuple(2 ** power * 1024 for power in range(6, 17, 2))
+
+# Ожидание блокировки файла вне пути запроса (страница, выход), с.
+STORE_TIMEOUT = 30
+
+# Имя: (тип, описание, границы корзин гистограммы).
+METRICS = {
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по представлениям.', LATENCY_BUCKETS),
+    'yatube_request_queries': (
+        'histogram', 'Число SQL-запросов на ответ.', QUERY_BUCKETS),
+    'yatube_request_memory_peak_bytes': (
+        'histogram', 'Пик выделенной за ответ памяти по tracemalloc; '
+                     'только при MEMORY_PROFILING.', MEMORY_BUCKETS),
+    'yatube_sql_duration_seconds_total': (
+        'counter', 'Суммарное время SQL-запросов.', None),
+    'yatube_template_duration_seconds_total': (
+        'counter', 'Суммарное время рендеринга шаблонов.', None),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения кэша по областям, result — hit или miss.', None),
+    'yatube_upload_processing_seconds': (
+        'histogram', 'Обработка загруженных изображений: queue — ожидание '
+                     'в очереди, thumbnails — построение миниатюр.',
+        UPLOAD_BUCKETS),
+}
+
+SCHEMA_SQL = """CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels)
+) WITHOUT ROWID"""
+
+UPSERT_SQL = """INSERT INTO metrics (name, labels, value) VALUES (?, ?, ?)
+    ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value"""
+
+_local = threading.local()
+_lock = threading.Lock()
+_pending = defaultdict(float)
+_last_flush = time.monotonic()
+
+
+def _escape(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _labels(labels):
+    return ','.join(f'{name}="{_escape(value)}"'
+                    for name, value in sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Прибавляет value к счётчику name с метками labels."""
+    with _lock:
+        _pending[name, _labels(labels)] += value
+
+
+def observe(name, value, **labels):
+    """Добавляет значение в гистограмму name."""
+    rendered = _labels(labels)
+    prefix = f'{rendered},' if rendered else ''
+    with _lock:
+        # Пустые корзины тоже записываются: Prometheus ждёт все границы.
+        for bound in METRICS[name][2]:
+            _pending[f'{name}_bucket', f'{prefix}le="{bound}"'] += (
+                value <= bound)
+        _pending[f'{name}_bucket', f'{prefix}le="+Inf"'] += 1
+        _pending[f'{name}_sum', rendered] += value
+        _pending[f'{name}_count', rendered] += 1
+
+
+def _connection(timeout=STORE_TIMEOUT):
+    """Соединение потока с хранилищем; timeout — сколько секунд ждать
+    блокировки файла другим процессом."""
+    key = (os.getpid(), settings.METRICS_STORE)
+    if getattr(_local, 'key', None) != key:
+        connection = sqlite3.connect(settings.METRICS_STORE,
+                                     timeout=timeout, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(SCHEMA_SQL)
+        _local.connection = connection
+        _local.key = key
+    _local.connection.execute(f'PRAGMA busy_timeout = {int(timeout * 1000)}')
+    return _local.connection
+
+
+def flush(timeout=STORE_TIMEOUT):
+    """Переносит накопленные приращения процесса в общий файл."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    try:
+        connection = _connection(timeout)
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                UPSERT_SQL,
+                [(name, labels, value)
+                 for (name, labels), value in pending.items()])
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+    except sqlite3.Error:
+        # Файл занят или недоступен: вернём приращения до следующего раза.
+        with _lock:
+            for key, value in pending.items():
+                _pending[key] += value
+        raise
+
+
+def flush_if_due(interval=None):
+    """Сбрасывает метрики, если с прошлого раза прошло interval секунд
+    (по умолчанию METRICS_FLUSH_INTERVAL).
+
+    Вызывается на пути запроса, поэтому ждёт занятый файл не дольше
+    METRICS_FLUSH_TIMEOUT: если не дождался или хранилище недоступно,
+    сброс откладывается до следующего раза без потери приращений.
+    """
+    if interval is None:
+        interval = settings.METRICS_FLUSH_INTERVAL
+    if time.monotonic() - _last_flush >= interval:
+        try:
+            flush(settings.METRICS_FLUSH_TIMEOUT)
+        except sqlite3.Error:
+            pass
+
+
+def clear():
+    """Обнуляет все метрики; для тестов."""
+    with _lock:
+        _pending.clear()
+    _connection().execute('DELETE FROM metrics')
+
+
+def _format(value):
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _braces(labels):
+    return f'{{{labels}}}' if labels else ''
+
+
+def _bucket_order(labels):
+    rest, _, bound = labels.rpartition('le=')
+    return rest, float(bound.strip('"'))
+
+
+def render():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    flush()
+    series = defaultdict(list)
+    for name, labels, value in _connection().execute(
+            'SELECT name, labels, value FROM metrics ORDER BY name, labels'):
+        series[name].append((labels, value))
+    lines = []
+    for name, (kind, description, _) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'histogram':
+            series[f'{name}_bucket'].sort(
+                key=lambda item: _bucket_order(item[0]))
+            suffixes = ('_bucket', '_sum', '_count')
+        else:
+            suffixes = ('',)
+        for suffix in suffixes:
+            lines += [f'{name}{suffix}{_braces(labels)} {_format(value)}'
+                      for labels, value in series[f'{name}{suffix}']]
+
+    ratios = defaultdict(lambda: [0, 0])
+    for labels, value in series['yatube_cache_requests_total']:
+        area, _, result = labels.rpartition(',')
+        ratios[area][result != 'result="hit"'] += value
+    lines += ['# HELP yatube_cache_hit_ratio Доля попаданий в кэш по '
+              'областям за всё время.',
+              '# TYPE yatube_cache_hit_ratio gauge']
+    lines += [f'yatube_cache_hit_ratio{{{area}}} '
+              f'{_format(hits / (hits + misses))}'
+              for area, (hits, misses) in sorted(ratios.items())]
+    return '\n'.join(lines) + '\n'
+
+
+def _forget_after_fork():
+    # Дочерний процесс получил копию чужих приращений: их сбросит
+    # родитель, иначе они попадут в хранилище дважды.
+    global _lock
+    _lock = threading.Lock()
+    _pending.clear()
+
+
+os.register_at_fork(after_in_child=_forget_after_fork)
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        pass
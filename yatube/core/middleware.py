@@ -0,0 +1,59 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import memory, metrics, metrics_store, profiling
+
+
+class PerformanceMiddleware:
+    """Считает SQL, шаблоны, кэш и общее время запроса по имени
+    представления и, если включён SERVER_TIMING, отдаёт их в заголовке
+    Server-Timing. Раз в METRICS_FLUSH_INTERVAL секунд переносит метрики
+    процесса в общее хранилище. С MEMORY_PROFILING ещё и замеряет пик
+    памяти запроса через tracemalloc."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.instrument_templates()
+        if settings.MEMORY_PROFILING:
+            memory.start()
+
+    def __call__(self, request):
+        metrics.instrument_caches()
+        started = time.perf_counter()
+        with metrics.collecting() as stats, ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(metrics.sql_wrapper))
+            usage = stack.enter_context(memory.MemoryUsage())
+            response = self.get_response(request)
+        stats.memory_peak = usage.peak
+        total_time = time.perf_counter() - started
+        match = request.resolver_match
+        metrics.record(match.view_name if match else 'unresolved',
+                       stats, total_time)
+        metrics_store.flush_if_due()
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = stats.server_timing(total_time)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = metrics.current()
+        if stats is not None:
+            stats.view = request.resolver_match.view_name
+
+
+class ProfilingMiddleware:
+    """Профилирует выборочные запросы, см. core.profiling. Стоит после
+    AuthenticationMiddleware: запрос сотрудника можно профилировать по
+    ?profile=1."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if profiling.should_profile(request):
+            return profiling.profile_request(self.get_response, request)
+        return self.get_response(request)
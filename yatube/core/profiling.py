@@ -0,0 +1,145 @@
+"""Профилирование выборочных запросов cProfile.
+
+ProfilingMiddleware профилирует долю PROFILER_SAMPLE_RATE запросов, а
+также запросы с подписанным заголовком X-Profile и запросы сотрудников
+с параметром ?profile=1. Профиль сохраняется в PROFILER_DIR файлом
+pstats рядом с JSON-описанием (представление, путь, время, SQL); старые
+файлы сверх PROFILER_MAX_FILES удаляются. Список и скачивание — на
+странице /admin/profiles/.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from . import metrics
+
+HEADER = 'HTTP_X_PROFILE'
+SALT = 'core.profiling'
+
+PROFILE_NAME = re.compile(r'^[\w.-]+\.prof$')
+
+
+def make_token():
+    """Значение заголовка X-Profile, действующее PROFILER_TOKEN_MAX_AGE."""
+    return signing.TimestampSigner(salt=SALT).sign('profile')
+
+
+def _valid_token(value):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(
+            value, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def should_profile(request):
+    if HEADER in request.META:
+        return _valid_token(request.META[HEADER])
+    if 'profile' in request.GET and request.user.is_staff:
+        return True
+    return random.random() < settings.PROFILER_SAMPLE_RATE
+
+
+def profile_request(get_response, request):
+    """Выполняет запрос под cProfile и сохраняет профиль; имя файла
+    уходит в заголовке ответа X-Profile."""
+    profiler = cProfile.Profile()
+    started = timezone.now()
+    timer = time.perf_counter()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    duration = time.perf_counter() - timer
+    match = request.resolver_match
+    stats = metrics.current()
+    response['X-Profile'] = save_profile(profiler, {
+        'view': match.view_name if match else 'unresolved',
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'started': started.isoformat(),
+        'duration_ms': round(duration * 1000, 2),
+        'sql_count': stats.sql_count if stats else None,
+        'sql_ms': round(stats.sql_time * 1000, 2) if stats else None,
+    }, started)
+    return response
+
+
+def save_profile(profiler, meta, started):
+    """Записывает профиль и описание; имя файла начинается со времени
+    запроса, поэтому сортировка по имени — сортировка по времени."""
+    directory = settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    stamp = timezone.localtime(started).strftime('%Y%m%dT%H%M%S.%f')
+    view = re.sub(r'[^\w.-]', '.', meta['view'])
+    name = (f'{stamp}-{view}-{meta["duration_ms"]:.0f}ms-'
+            f'{uuid.uuid4().hex[:8]}.prof')
+    profiler.dump_stats(os.path.join(directory, name))
+    meta['name'] = name
+    with open(os.path.join(directory, f'{name}.json'), 'w',
+              encoding='utf-8') as stream:
+        json.dump(meta, stream, ensure_ascii=False)
+    rotate()
+    return name
+
+
+def rotate():
+    """Оставляет PROFILER_MAX_FILES самых свежих профилей."""
+    directory = settings.PROFILER_DIR
+    names = sorted(name for name in os.listdir(directory)
+                   if PROFILE_NAME.match(name))
+    for name in names[:-settings.PROFILER_MAX_FILES]:
+        for path in (name, f'{name}.json'):
+            try:
+                os.remove(os.path.join(directory, path))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """Описания сохранённых профилей, новые первыми."""
+    directory = settings.PROFILER_DIR
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not PROFILE_NAME.match(name):
+            continue
+        try:
+            with open(os.path.join(directory, f'{name}.json'),
+                      encoding='utf-8') as stream:
+                meta = json.load(stream)
+        except (OSError, ValueError):
+            meta = {'name': name}
+        meta['size'] = os.path.getsize(os.path.join(directory, name))
+        profiles.append(meta)
+    return profiles
+
+
+def profile_path(name):
+    """Путь к файлу профиля или None для чужих и несуществующих имён."""
+    if not PROFILE_NAME.match(name):
+        return None
+    path = os.path.join(settings.PROFILER_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def profile_summary(path, limit=40):
+    """Самые дорогие по cumulative время функции профиля текстом."""
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats(
+        'cumulative').print_stats(limit)
+    return stream.getvalue()
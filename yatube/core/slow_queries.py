@@ -0,0 +1,107 @@
+"""Журнал медленных SQL-запросов.
+
+Обёртка execute_wrapper ставится на каждое соединение с базой и пишет
+в логгер ``yatube.slow_queries`` запросы дольше SLOW_QUERY_THRESHOLD
+секунд: представление или команду, место вызова в коде проекта, время
+и план EXPLAIN QUERY PLAN. Записи — строки JSON; ротацию файла делает
+RotatingFileHandler из settings.LOGGING, сводку — команда slow_queries.
+"""
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger('yatube.slow_queries')
+
+EXPLAIN_PREFIX = {'sqlite': 'EXPLAIN QUERY PLAN '}
+
+# Свои модули не считаются местом вызова запроса.
+_SKIP_FILES = (os.path.abspath(__file__).rsplit('.', 1)[0],
+               os.path.abspath(metrics.__file__).rsplit('.', 1)[0])
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created.
+
+    Обёртка встаёт первой в списке: execute_wrapper() снимает последнюю,
+    а соединение может открыться внутри такого блока.
+    """
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, slow_query_wrapper)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if threshold is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if duration >= threshold:
+            log_query(sql, params, many, context, duration)
+
+
+def caller():
+    """Ближайший к запросу кадр стека из кода проекта."""
+    for frame in reversed(traceback.extract_stack()):
+        filename = os.path.abspath(frame.filename)
+        if (not filename.startswith(settings.BASE_DIR)
+                or filename.rsplit('.', 1)[0] in _SKIP_FILES):
+            continue
+        path = os.path.relpath(filename, settings.BASE_DIR)
+        return f'{path}:{frame.lineno} in {frame.name}'
+    return None
+
+
+def source():
+    """Представление текущего запроса или запущенная команда."""
+    stats = metrics.current()
+    if stats is not None and stats.view:
+        return stats.view
+    if len(sys.argv) > 1 and sys.argv[0].endswith('manage.py'):
+        return f'command:{sys.argv[1]}'
+    return None
+
+
+def explain(sql, params, connection):
+    """План запроса SELECT; для остальных запросов — пустой список.
+
+    Курсор берётся напрямую у бэкенда: EXPLAIN не проходит через
+    обёртки и не попадает ни в журнал, ни в счётчики запросов.
+    """
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return []
+    prefix = EXPLAIN_PREFIX.get(connection.vendor, 'EXPLAIN ')
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        return [str(row[-1]) if connection.vendor == 'sqlite' else str(row)
+                for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не выполнен: {error}']
+    finally:
+        cursor.close()
+
+
+def log_query(sql, params, many, context, duration):
+    connection = context['connection']
+    record = {
+        'time': timezone.now().isoformat(),
+        'duration_ms': round(duration * 1000, 3),
+        'source': source(),
+        'location': caller(),
+        'alias': connection.alias,
+        'sql': sql,
+        'many': many,
+        'plan': [] if many else explain(sql, params, connection),
+    }
+    logger.warning(json.dumps(record, ensure_ascii=False))
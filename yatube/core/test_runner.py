@@ -0,0 +1,27 @@
+import os
+import shutil
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics_store
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты с хранилищем метрик во временном каталоге: запросы
+    тестов не пишут в файл рабочего сервера и в дерево исходников."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_settings = override_settings(
+            METRICS_STORE=os.path.join(self.temp_dir, 'metrics.sqlite3'))
+        self.temp_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Иначе остаток приращений сбросится при выходе уже в рабочий файл.
+        metrics_store.flush()
+        self.temp_settings.disable()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+from core.cache import CULL_EVERY, KEYS_PER_QUERY, SQLiteCache
+
+
+def increment(location, times):
+    cache = SQLiteCache(location, {})
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_basic_operations(self):
+        """Значения, add, incr, удаление и истечение срока работают
+        как в бэкендах Django."""
+        cache = self.cache
+        cache.set('page', {'html': 'страница'})
+        self.assertEqual(cache.get('page'), {'html': 'страница'})
+        self.assertFalse(cache.add('page', 'другое'))
+        self.assertEqual(cache.get_many(['page', 'missing']),
+                         {'page': {'html': 'страница'}})
+        cache.set('count', 1)
+        self.assertEqual(cache.incr('count', 5), 6)
+        self.assertEqual(cache.decr('count'), 5)
+        with self.assertRaises(ValueError):
+            cache.incr('missing')
+        cache.delete('page')
+        self.assertIsNone(cache.get('page'))
+        cache.set('short', 'value', 0.01)
+        time.sleep(0.02)
+        self.assertFalse(cache.has_key('short'))
+        self.assertTrue(cache.add('short', 'new'))
+        self.assertEqual(cache.get('short'), 'new')
+
+    @skipUnless(hasattr(sqlite3.Connection, 'setlimit'),
+                'sqlite3.Connection.setlimit появился в Python 3.11')
+    def test_many_keys_fit_old_sqlite_limit(self):
+        """get_many и delete_many укладываются в 999 параметров
+        запроса, как на SQLite до 3.32."""
+        cache = SQLiteCache(self.location,
+                            {'OPTIONS': {'MAX_ENTRIES': KEYS_PER_QUERY * 4}})
+        cache._connection().setlimit(
+            sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        data = {f'key{i}': i for i in range(KEYS_PER_QUERY * 3)}
+        cache.set_many(data)
+        cache._connection().execute('UPDATE cache SET accessed = 0')
+        self.assertEqual(cache.get_many(data), data)
+        cache.delete_many(data)
+        self.assertEqual(cache.get_many(data), {})
+
+    def test_incr_is_atomic_across_processes(self):
+        """Инкременты из нескольких процессов не теряются, и все
+        процессы видят одно значение."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=increment,
+                                   args=(self.location, 50))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_least_recently_read_are_evicted(self):
+        """При переполнении вытесняются давно не читавшиеся ключи."""
+        cache = SQLiteCache(self.location, {'OPTIONS': {'MAX_ENTRIES': 10}})
+        for i in range(CULL_EVERY - 1):
+            cache.set(f'key{i}', i)
+        cache._connection().execute('UPDATE cache SET accessed = 0')
+        self.assertEqual(cache.get('key0'), 0)
+        cache.set('last', 'value')
+        self.assertEqual(cache.get('key0'), 0)
+        self.assertIsNone(cache.get('key1'))
+        count = cache._connection().execute(
+            'SELECT COUNT(*) FROM cache').fetchone()[0]
+        self.assertLessEqual(count, 10)
@@ -0,0 +1,40 @@
+import tracemalloc
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+from core import memory
+
+BLOCK_SIZE = 1024 * 1024
+
+
+class MemoryUsageTests(SimpleTestCase):
+
+    def setUp(self):
+        if memory.start():
+            self.addCleanup(tracemalloc.stop)
+
+    def test_retained_memory(self):
+        """Память, занятая к выходу из блока, входит и в пик, и в
+        остаток."""
+        with memory.MemoryUsage() as usage:
+            data = bytearray(BLOCK_SIZE)
+        self.assertGreaterEqual(usage.retained, BLOCK_SIZE)
+        self.assertGreaterEqual(usage.peak, usage.retained)
+        del data
+
+    @skipUnless(hasattr(tracemalloc, 'reset_peak'),
+                'tracemalloc.reset_peak() есть только с Python 3.9')
+    def test_nested_block_keeps_outer_peak(self):
+        """Вложенный блок не сбрасывает пик внешнего, а его собственный
+        пик учитывается во внешнем."""
+        with memory.MemoryUsage() as outer:
+            data = bytearray(3 * BLOCK_SIZE)
+            del data
+            with memory.MemoryUsage() as inner:
+                data = bytearray(2 * BLOCK_SIZE)
+                del data
+            data = bytearray(BLOCK_SIZE)
+            del data
+        self.assertGreaterEqual(outer.peak, 3 * BLOCK_SIZE)
+        self.assertGreaterEqual(inner.peak, 2 * BLOCK_SIZE)
+        self.assertLess(inner.peak, 3 * BLOCK_SIZE)
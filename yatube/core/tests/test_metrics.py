@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core import metrics, metrics_store
+from posts.models import Post
+
+User = get_user_model()
+
+
+def record_request(view):
+    metrics_store.observe('yatube_request_duration_seconds', 0.02, view=view)
+    metrics_store.inc('yatube_cache_requests_total', area='post_list',
+                      result='hit')
+    metrics_store.flush()
+
+
+class MetricsTestCase(TestCase):
+    """Метрики пишутся во временное хранилище."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        store = self.settings(
+            METRICS_STORE=os.path.join(directory, 'metrics.sqlite3'))
+        store.enable()
+        self.addCleanup(store.disable)
+        metrics_store.clear()
+        cache.clear()
+        metrics.reset()
+
+
+class PerformanceMiddlewareTests(MetricsTestCase):
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        """Ответ содержит SQL, шаблоны, кэш и общее время запроса."""
+        response = Client().get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('sql;dur=', 'template;dur=', 'cache;dur=',
+                     'total;dur='):
+            self.assertIn(name, timing)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_header_disabled(self):
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_totals_by_view_name(self):
+        """Метрики копятся по имени представления; повторный запрос
+        берёт список постов из кэша."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        first = metrics.snapshot()['posts:index']
+        client.get(reverse('posts:index'))
+        totals = metrics.snapshot()['posts:index']
+        self.assertEqual(totals['requests'], 2)
+        self.assertGreater(first['sql_count'], 0)
+        self.assertGreater(first['template_time'], 0)
+        self.assertGreater(first['cache_misses'], 0)
+        self.assertLess(totals['sql_count'], 2 * first['sql_count'])
+        self.assertGreater(totals['cache_hits'], first['cache_hits'])
+        self.assertGreater(totals['total_time'], totals['template_time'])
+
+    def test_nested_cache_calls_counted_once(self):
+        """get внутри get_many (и наоборот) не считается дважды."""
+        cache.set('present', 1)
+        with metrics.collecting() as stats:
+            metrics.instrument_caches()
+            self.assertEqual(cache.get_many(['present', 'absent']),
+                             {'present': 1})
+            self.assertIsNone(cache.get('absent'))
+            self.assertEqual(cache.get('absent', 'default'), 'default')
+        self.assertEqual((stats.cache_hits, stats.cache_misses), (1, 3))
+
+
+class MetricsEndpointTests(MetricsTestCase):
+
+    def test_exposes_histograms_and_cache_ratios(self):
+        """Страница отдаёт гистограммы по представлениям и долю
+        попаданий в кэш списка постов."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        client.force_login(User.objects.create_user(username='staff',
+                                                    is_staff=True))
+        response = client.get(reverse('metrics'))
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      body)
+        self.assertIn('yatube_request_duration_seconds_count'
+                      '{view="posts:index"} 2', body)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="posts:index",le="+Inf"} 2', body)
+        self.assertIn('yatube_request_queries_sum{view="posts:index"}', body)
+        self.assertIn('yatube_cache_hit_ratio{area="post_list"} 0.5', body)
+
+    def test_aggregates_worker_processes(self):
+        """Метрики разных процессов складываются."""
+        workers = [multiprocessing.Process(target=record_request,
+                                           args=('posts:index',))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        record_request('posts:index')
+        body = metrics_store.render()
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="posts:index",le="0.025"} 4', body)
+        self.assertIn('yatube_request_duration_seconds_bucket'
+                      '{view="posts:index",le="0.01"} 0', body)
+        self.assertIn('yatube_cache_requests_total'
+                      '{area="post_list",result="hit"} 4', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_hidden_without_token(self):
+        """Без входа страница доступна только по токену, даже с
+        локального адреса за обратным прокси."""
+        client = Client(REMOTE_ADDR='127.0.0.1')
+        for authorization, status in (('', 404), ('Bearer wrong', 404),
+                                      ('Bearer secret', 200)):
+            with self.subTest(authorization=authorization):
+                response = client.get(reverse('metrics'),
+                                      HTTP_AUTHORIZATION=authorization)
+                self.assertEqual(response.status_code, status)
+
+    @override_settings(METRICS_FLUSH_INTERVAL=0, METRICS_FLUSH_TIMEOUT=0.01)
+    def test_request_does_not_wait_for_locked_store(self):
+        """Запрос не ждёт занятое хранилище: сброс откладывается, и
+        приращения попадают в него следующим сбросом."""
+        locker = sqlite3.connect(settings.METRICS_STORE,
+                                 isolation_level=None)
+        self.addCleanup(locker.close)
+        locker.execute('BEGIN IMMEDIATE')
+        started = time.perf_counter()
+        Client().get(reverse('posts:index'))
+        self.assertLess(time.perf_counter() - started, 5)
+        locker.execute('ROLLBACK')
+        self.assertIn('yatube_request_duration_seconds_count'
+                      '{view="posts:index"} 1', metrics_store.render())
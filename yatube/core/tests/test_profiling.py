@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from core import profiling
+
+User = get_user_model()
+
+
+class ProfilingTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        override = self.settings(PROFILER_DIR=self.directory,
+                                 PROFILER_SAMPLE_RATE=0)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.staff = Client()
+        self.staff.force_login(ProfilingTests.admin)
+
+    def profiles(self):
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.endswith('.prof'))
+
+    def test_staff_flag_profiles_request(self):
+        """Запрос сотрудника с ?profile=1 сохраняет профиль, который
+        виден и скачивается на странице админки."""
+        response = self.staff.get(reverse('posts:index') + '?profile=1')
+        name = response['X-Profile']
+        self.assertEqual(self.profiles(), [name])
+        self.assertIn('posts.index', name)
+
+        page = self.staff.get(reverse('profiles'))
+        self.assertContains(page, 'posts:index')
+        self.assertContains(page, reverse('profile_download', args=[name]))
+        download = self.staff.get(reverse('profile_download', args=[name]))
+        self.assertIn('attachment', download['Content-Disposition'])
+        summary = self.staff.get(
+            reverse('profile_download', args=[name]) + '?format=text')
+        self.assertContains(summary, 'function calls')
+
+    def test_signed_header(self):
+        """Гостя профилирует только верно подписанный заголовок."""
+        client = Client()
+        response = client.get(reverse('posts:index'),
+                              HTTP_X_PROFILE=profiling.make_token())
+        self.assertTrue(response.has_header('X-Profile'))
+        response = client.get(reverse('posts:index'),
+                              HTTP_X_PROFILE='profile:forged')
+        self.assertFalse(response.has_header('X-Profile'))
+        response = client.get(reverse('posts:index') + '?profile=1')
+        self.assertFalse(response.has_header('X-Profile'))
+        self.assertEqual(len(self.profiles()), 1)
+
+    def test_sampling_and_rotation(self):
+        """При доле 1 профилируется каждый запрос, а хранятся только
+        PROFILER_MAX_FILES последних профилей."""
+        with self.settings(PROFILER_SAMPLE_RATE=1, PROFILER_MAX_FILES=2):
+            names = [Client().get(reverse('posts:index'))['X-Profile']
+                     for _ in range(3)]
+        self.assertEqual(self.profiles(), sorted(names[1:]))
+        self.assertEqual(len(os.listdir(self.directory)), 4)
+
+    def test_admin_page_is_staff_only(self):
+        client = Client()
+        client.force_login(ProfilingTests.user)
+        response = client.get(reverse('profiles'))
+        self.assertRedirects(
+            response, reverse('admin:login') + '?next='
+            + reverse('profiles'))
+        for name in ('missing.prof', 'db.sqlite3'):
+            response = self.staff.get(reverse('profile_download',
+                                              args=[name]))
+            self.assertEqual(response.status_code, 404)
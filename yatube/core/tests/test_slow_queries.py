@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core import slow_queries
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        Post.objects.create(text='Тестовый пост', author=cls.user)
+
+    @override_settings(SLOW_QUERY_THRESHOLD=0)
+    def test_logs_view_location_and_plan(self):
+        """Запрос дольше порога пишется с представлением, местом вызова
+        и планом."""
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            Client().get(reverse('posts:profile', args=['HasNoName']))
+        records = [json.loads(record.getMessage())
+                   for record in logs.records]
+        posts = [record for record in records
+                 if 'FROM "posts_post"' in record['sql']]
+        self.assertTrue(posts)
+        self.assertEqual(posts[0]['source'], 'posts:profile')
+        self.assertTrue(posts[0]['location'].startswith('posts/'))
+        self.assertTrue(posts[0]['plan'])
+
+    @override_settings(SLOW_QUERY_THRESHOLD=None)
+    def test_disabled(self):
+        with mock.patch.object(slow_queries.logger, 'warning') as warning:
+            Client().get(reverse('posts:index'))
+        warning.assert_not_called()
+
+
+class SlowQueriesCommandTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.log = os.path.join(self.directory, 'slow_queries.log')
+
+    def write(self, path, records):
+        with open(path, 'w', encoding='utf-8') as stream:
+            for record in records:
+                stream.write(json.dumps(record) + '\n')
+
+    def test_summary_groups_queries_and_flags_scans(self):
+        """Запросы, отличающиеся длиной IN, сводятся в один; полный
+        просмотр таблицы отмечается, ротированные копии учитываются."""
+        follows = {
+            'sql': 'SELECT 1 FROM "posts_follow" WHERE "author_id" IN '
+                   '(%s, %s)',
+            'plan': ['SCAN posts_follow'], 'source': 'posts:profile',
+            'location': 'posts/views.py:80 in profile', 'duration_ms': 300,
+        }
+        index = {
+            'sql': 'SELECT * FROM "posts_post" LIMIT 10',
+            'plan': ['SCAN posts_post USING INDEX post_pub_date_idx'],
+            'source': 'posts:index', 'location': None, 'duration_ms': 150,
+        }
+        self.write(f'{self.log}.1', [follows])
+        self.write(self.log, [
+            index,
+            dict(follows, sql=follows['sql'].replace('%s)', '%s, %s)'),
+                 duration_ms=500),
+        ])
+        output = StringIO()
+        call_command('slow_queries', '--log', self.log, stdout=output)
+        report = output.getvalue()
+        self.assertIn('1. Выполнений: 2, всего 800.0 мс', report)
+        self.assertIn('IN (...)', report)
+        self.assertIn('полный просмотр posts_follow', report)
+        self.assertNotIn('полный просмотр posts_post', report)
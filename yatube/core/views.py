@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
 from django.shortcuts import render
 
+from . import metrics_store, profiling
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -7,3 +13,45 @@ def page_not_found(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def _has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        return False
+    given = request.META.get('HTTP_AUTHORIZATION', '')
+    return hmac.compare_digest(given.encode(), f'Bearer {token}'.encode())
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus; доступны
+    сотрудникам и по токену METRICS_TOKEN в заголовке Authorization."""
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise Http404
+    return HttpResponse(metrics_store.render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
+def profiles(request):
+    """Сохранённые профили запросов; доступ только сотрудникам через
+    admin_view."""
+    context = {
+        'title': 'Профили запросов',
+        'profiles': profiling.list_profiles(),
+        'token': profiling.make_token(),
+        'sample_rate': settings.PROFILER_SAMPLE_RATE,
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+def profile_download(request, name):
+    """Файл pstats профиля или, с ?format=text, его сводка."""
+    path = profiling.profile_path(name)
+    if path is None:
+        raise Http404
+    if request.GET.get('format') == 'text':
+        return HttpResponse(profiling.profile_summary(path),
+                            content_type='text/plain; charset=utf-8')
+    return FileResponse(open(path, 'rb'), as_attachment=True,
+                        filename=name)
@@ -1,6 +1,23 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from .export import FORMATS, export_lines
 from .models import Post, Group
+from .search import filter_matching
+
+
+def export_action(data_format):
+    def export(modeladmin, request, queryset):
+        response = StreamingHttpResponse(
+            export_lines(data_format, queryset),
+            content_type=FORMATS[data_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="posts.{data_format}"')
+        return response
+    export.short_description = f'Выгрузить выбранные записи в {data_format}'
+    export.__name__ = f'export_{data_format}'
+    return export
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -9,6 +26,13 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    actions = [export_action(data_format) for data_format in FORMATS]
+
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по тексту идёт через полнотекстовый индекс, а не LIKE.
+        if not search_term.strip():
+            return queryset, False
+        return filter_matching(queryset, search_term), False
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,105 @@
+"""Read-only JSON API поверх тех же выборок, что и HTML-страницы posts."""
+import hashlib
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+
+from .feed import FEED_CURSOR, feed_posts
+from .models import Comment, Group, Post
+from .paginators import CursorPaginator
+
+User = get_user_model()
+
+API_PAGE_SIZE = 20
+
+
+def serialize_post(post):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'updated': post.updated.isoformat(),
+        'author': post.author.username,
+        'group': post.group.slug if post.group_id else None,
+        'image': post.image.url if post.image else None,
+    }
+
+
+def serialize_comment(comment):
+    return {
+        'id': comment.pk,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created.isoformat(),
+    }
+
+
+def json_page(request, queryset, serialize, ordering='-pub_date', pk='pk'):
+    """Страница выборки в JSON со строгим ETag.
+
+    ETag — хэш тела ответа, поэтому совпадает только для байт-в-байт
+    одинаковых страниц; на совпавший If-None-Match уходит 304 без тела.
+    """
+    page = CursorPaginator(queryset, API_PAGE_SIZE, ordering, pk).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    data = {
+        'results': [serialize(obj) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    body = body.encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def _posts(queryset):
+    return queryset.select_related('author', 'group')
+
+
+@require_GET
+def posts(request):
+    return json_page(request, _posts(Post.objects.all()), serialize_post)
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return json_page(request, _posts(group.posts.all()), serialize_post)
+
+
+@require_GET
+def author_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return json_page(request, _posts(author.posts.all()), serialize_post)
+
+
+@require_GET
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Нужна авторизация'},
+                            status=HTTPStatus.UNAUTHORIZED)
+    return json_page(request, _posts(feed_posts(request.user)),
+                     serialize_post, **FEED_CURSOR)
+
+
+@require_GET
+def post_comments(request, post_id):
+    get_object_or_404(Post.objects.only('id'), pk=post_id)
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    return json_page(request, comments, serialize_comment,
+                     ordering='created')
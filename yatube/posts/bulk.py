@@ -0,0 +1,37 @@
+"""Помощники массовой вставки через bulk_create в обход save()."""
+from django.db import connections, router, transaction
+from django.db.models import QuerySet
+
+
+class _RawInsertQuerySet(QuerySet):
+    # Вставка raw, как при loaddata: значения берутся из объектов как
+    # есть, pre_save полей (auto_now/auto_now_add) не вызывается.
+    def _insert(self, objs, fields, return_id=False, raw=False, using=None,
+                ignore_conflicts=False):
+        return super()._insert(objs, fields, return_id=return_id, raw=True,
+                               using=using, ignore_conflicts=ignore_conflicts)
+
+
+def bulk_create(model, objs, batch_size=None):
+    """bulk_create, сохраняющий заданные даты вместо auto_now/auto_now_add.
+
+    Объекты без id получают id базы. SQLite не возвращает их из
+    многострочного INSERT, поэтому они читаются следом: строки без id
+    вставляются последними и под блокировкой записи, так что это самые
+    большие id таблицы.
+    """
+    objs = list(objs)
+    using = router.db_for_write(model)
+    with transaction.atomic(using=using, savepoint=False):
+        _RawInsertQuerySet(model, using=using).bulk_create(
+            objs, batch_size=batch_size)
+        missing = [obj for obj in objs if obj.pk is None]
+        if missing and not (
+                connections[using].features.can_return_ids_from_bulk_insert):
+            ids = list(model._base_manager.using(using).order_by(
+                '-pk').values_list('pk', flat=True)[:len(missing)])
+            for obj, pk in zip(missing, reversed(ids)):
+                obj.pk = pk
+                obj._state.adding = False
+                obj._state.db = using
+    return objs
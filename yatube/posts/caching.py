@@ -0,0 +1,69 @@
+import time
+
+from django.core.cache import cache
+
+GROUPS_SCOPE = 'groups'
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def _version_key(scope):
+    return f'posts:page_version:{scope}'
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def profile_scope(username):
+    return f'profile:{username}'
+
+
+def follows_scope(user_id):
+    # Подписки пользователя: от них зависят только кнопки подписки,
+    # а не общий для всех список постов.
+    return f'follows:{user_id}'
+
+
+def page_versions(scopes):
+    """Текущие версии областей кэша страниц.
+
+    Версия, которой ещё нет в кэше, начинается с текущего времени, чтобы
+    после вытеснения ключа версии не подхватить старые страницы.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_page_versions(*scopes):
+    """Сбрасывает закэшированные страницы указанных областей."""
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), None)
+
+
+def page_cache_key(scope, request):
+    """Ключ кэша общей для всех пользователей части страницы — списка
+    постов с пагинатором.
+
+    В ключ входят версии области страницы и общей области сообществ, так
+    что изменение любой из них делает старую копию недостижимой, и
+    параметры пагинации. Шапка и кнопки подписки рендерятся для каждого
+    запроса отдельно и в кэш не попадают.
+    """
+    scopes = (scope, GROUPS_SCOPE)
+    parts = [f'{name}-{version}' for name, version
+             in zip(scopes, page_versions(scopes))]
+    parts += [request.GET.get(param, '') for param in PAGE_PARAMS]
+    return '.'.join(parts)
@@ -0,0 +1,102 @@
+"""Условные GET-запросы (ETag/Last-Modified) для HTML-страниц posts.
+
+Валидаторы страницы считаются одним агрегатным запросом по индексам и
+версиям из кэша страниц; при совпадении с заголовками клиента ответ 304
+уходит до запросов страницы и рендеринга шаблона.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .caching import (GROUPS_SCOPE, follows_scope, group_scope, index_scope,
+                      page_versions, profile_scope)
+from .counters import author_posts_count
+from .models import Post
+
+
+def _latest(queryset):
+    return queryset.aggregate(latest=Max('updated'))['latest']
+
+
+def index_validators():
+    latest = _latest(Post.objects.all())
+    return latest, page_versions((index_scope(), GROUPS_SCOPE))
+
+
+def group_validators(slug):
+    latest = _latest(Post.objects.filter(group__slug=slug))
+    return latest, page_versions((group_scope(slug), GROUPS_SCOPE))
+
+
+def profile_validators(username):
+    latest = _latest(Post.objects.filter(author__username=username))
+    return latest, page_versions((profile_scope(username), GROUPS_SCOPE))
+
+
+def post_validators(post_id):
+    """Изменение поста или новый комментарий меняют Last-Modified.
+
+    Удаление комментария и импорт комментариев со старыми датами дату не
+    сдвигают, поэтому в ETag входят ещё число комментариев и последний
+    id. Счётчик постов и имя автора выводятся на странице, но не связаны
+    с датами этого поста, поэтому тоже входят только в ETag: имя — через
+    версию области профиля, которую сбрасывает переименование.
+    """
+    row = Post.objects.filter(pk=post_id).annotate(
+        commented=Max('comments__created'),
+        comments_count=Count('comments'),
+        last_comment=Max('comments__id'),
+    ).values('updated', 'commented', 'comments_count', 'last_comment',
+             'author_id', 'author__username').first()
+    if row is None:
+        return None, ()
+    latest = max(filter(None, (row['updated'], row['commented'])))
+    versions = page_versions((GROUPS_SCOPE,
+                              profile_scope(row['author__username'])))
+    return latest, (*versions, row['comments_count'], row['last_comment'],
+                    author_posts_count(row['author_id']))
+
+
+def conditional_page(validators):
+    """Отдаёт 304, если страница не менялась с прошлого ответа клиенту.
+
+    validators вызывается с аргументами представления и возвращает дату
+    последнего изменения (или None) и значения, от которых ещё зависит
+    страница. Шапка и кнопки подписки свои у каждого пользователя,
+    поэтому его id и версия его подписок тоже входят в ETag.
+    Last-Modified отдаётся только вместе с ETag, а 304 решает ETag:
+    удаление поста не сдвигает Max('updated'), и по одному
+    If-Modified-Since клиент получил бы устаревшую страницу. Браузер
+    обязан перепроверять страницу при каждом показе, поэтому ответ
+    отдаётся с max-age=0.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            latest, extra = validators(*args, **kwargs)
+            user_id = request.user.pk
+            if user_id is not None:
+                extra = (*extra, *page_versions((follows_scope(user_id),)))
+            raw = '|'.join(map(str, (
+                user_id, latest and latest.isoformat(), *extra,
+            )))
+            etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+            last_modified = int(latest.timestamp()) if latest else None
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                if response.has_header('Expires'):
+                    del response['Expires']
+                patch_cache_control(response, max_age=0)
+            return response
+        return wrapper
+    return decorator
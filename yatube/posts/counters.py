@@ -0,0 +1,84 @@
+from collections import Counter
+
+from django.core.cache import cache
+
+from .models import FeedItem, Follow, Post
+
+COUNT_TIMEOUT = 60 * 5
+
+
+def _key(scope, pk=''):
+    return f'posts:count:{scope}:{pk}'
+
+
+def _cached_count(key, queryset):
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def _shift(key, delta):
+    """Сдвигает закэшированный счётчик; отсутствующий посчитается заново."""
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def all_posts_count():
+    return _cached_count(_key('all'), Post.objects.all())
+
+
+def author_posts_count(author_id):
+    return _cached_count(_key('author', author_id),
+                         Post.objects.filter(author_id=author_id))
+
+
+def group_posts_count(group_id):
+    return _cached_count(_key('group', group_id),
+                         Post.objects.filter(group_id=group_id))
+
+
+def feed_posts_count(user_id):
+    return _cached_count(_key('feed', user_id),
+                         FeedItem.objects.filter(user_id=user_id))
+
+
+def post_added(post, delta=1):
+    """Учитывает появление (delta=1) или удаление (delta=-1) поста."""
+    _shift(_key('all'), delta)
+    _shift(_key('author', post.author_id), delta)
+    if post.group_id:
+        _shift(_key('group', post.group_id), delta)
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    cache.delete_many([_key('feed', user_id) for user_id in followers])
+
+
+def posts_imported(posts):
+    """Учитывает посты, созданные массово в обход сигналов."""
+    _shift(_key('all'), len(posts))
+    authors = Counter(post.author_id for post in posts)
+    for author_id, delta in authors.items():
+        _shift(_key('author', author_id), delta)
+    groups = Counter(post.group_id for post in posts if post.group_id)
+    for group_id, delta in groups.items():
+        _shift(_key('group', group_id), delta)
+    followers = Follow.objects.filter(
+        author_id__in={post.author_id for post in posts}
+    ).values_list('user_id', flat=True).distinct()
+    cache.delete_many([_key('feed', user_id) for user_id in followers])
+
+
+def post_regrouped(old_group_id, new_group_id):
+    if old_group_id:
+        _shift(_key('group', old_group_id), -1)
+    if new_group_id:
+        _shift(_key('group', new_group_id), 1)
+
+
+def follow_changed(follow):
+    cache.delete(_key('feed', follow.user_id))
@@ -0,0 +1,78 @@
+"""Потоковая выгрузка постов с комментариями в JSONL и CSV.
+
+Посты читаются keyset-блоками по id, комментарии — одним запросом на
+блок, а строки отдаются генератором, поэтому память не зависит от
+размера таблиц. Используется командой export_content и действием
+админки.
+"""
+import csv
+import json
+from itertools import groupby
+
+from .api import serialize_comment, serialize_post
+from .models import Comment, Post
+
+EXPORT_CHUNK_SIZE = 1000
+
+CSV_FIELDS = ('id', 'pub_date', 'updated', 'author', 'group', 'image',
+              'text', 'comments')
+
+FORMATS = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_posts(queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Словари постов с вложенным списком комментариев, по возрастанию id."""
+    if queryset is None:
+        queryset = Post.objects.all()
+    queryset = queryset.select_related('author', 'group').order_by('pk')
+    last_pk = 0
+    while True:
+        posts = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not posts:
+            return
+        comments = Comment.objects.filter(
+            post_id__in=[post.pk for post in posts]
+        ).select_related('author').order_by('post_id', 'created', 'pk')
+        by_post = {
+            post_id: [serialize_comment(comment) for comment in group]
+            for post_id, group in groupby(comments.iterator(),
+                                          key=lambda comment: comment.post_id)
+        }
+        for post in posts:
+            data = serialize_post(post)
+            # Имя файла в хранилище, а не URL: его принимает импорт.
+            data['image'] = post.image.name or None
+            data['comments'] = by_post.get(post.pk, [])
+            yield data
+        last_pk = posts[-1].pk
+
+
+class _Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def csv_lines(rows):
+    """CSV по строке на пост; комментарии — JSON-массив в колонке."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for row in rows:
+        row['comments'] = json.dumps(row['comments'], ensure_ascii=False)
+        yield writer.writerow([row[field] for field in CSV_FIELDS])
+
+
+def export_lines(data_format, queryset=None, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = export_posts(queryset, chunk_size)
+    if data_format == 'csv':
+        return csv_lines(rows)
+    return jsonl_lines(rows)
@@ -0,0 +1,46 @@
+"""Кэш графа подписок: отсортированные id авторов каждого читателя.
+
+Подписки пользователя хранятся в кэше одним массивом 64-битных id
+(array('q')), поэтому даже тысячи подписок занимают несколько килобайт,
+а проверка подписки — бинарный поиск без обращения к базе. Сигналы
+подписки и отписки сбрасывают запись читателя; следующее чтение
+собирает её одним запросом по индексу (user, author).
+"""
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Follow
+
+FOLLOW_GRAPH_TIMEOUT = 60 * 5
+
+
+def _key(user_id):
+    return f'posts:follows:{user_id}'
+
+
+def followed_author_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    ids = array('q')
+    if user_id is None:
+        return ids
+    data = cache.get(_key(user_id))
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    ids.extend(Follow.objects.filter(
+        user_id=user_id
+    ).order_by('author_id').values_list('author_id', flat=True))
+    cache.set(_key(user_id), ids.tobytes(), FOLLOW_GRAPH_TIMEOUT)
+    return ids
+
+
+def is_following(user_id, author_id):
+    ids = followed_author_ids(user_id)
+    index = bisect_left(ids, author_id)
+    return index < len(ids) and ids[index] == author_id
+
+
+def follow_changed(follow):
+    cache.delete(_key(follow.user_id))
@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.follow_graph import _key, followed_author_ids, is_following
+from posts.models import Follow
+
+User = get_user_model()
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95)]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает проверку подписки запросом Follow.exists() и по '
+            'кэшу графа подписок для читателей с тысячами подписок. '
+            'Данные создаются во временной транзакции и откатываются, '
+            'записи читателей удаляются из кэша; остальной кэш не '
+            'трогается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=5000)
+        parser.add_argument('--readers', type=int, default=20)
+        parser.add_argument('--follows', type=int, default=3000,
+                            help='Подписок у каждого читателя.')
+        parser.add_argument('--repeat', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        readers = []
+        try:
+            with transaction.atomic():
+                readers, author_ids = self.seed(options)
+                self.report(readers, author_ids, options['repeat'])
+                transaction.set_rollback(True)
+        finally:
+            # После отката id читателей достанутся настоящим
+            # пользователям — их записи графа не должны остаться в кэше.
+            cache.delete_many([_key(reader) for reader in readers])
+
+    def seed(self, options):
+        rnd = random.Random(0)
+        User.objects.bulk_create(
+            User(username=f'graph_author_{i}', password='!')
+            for i in range(options['authors'])
+        )
+        User.objects.bulk_create(
+            User(username=f'graph_reader_{i}', password='!')
+            for i in range(options['readers'])
+        )
+        author_ids = list(User.objects.filter(
+            username__startswith='graph_author_'
+        ).values_list('id', flat=True))
+        readers = list(User.objects.filter(
+            username__startswith='graph_reader_'
+        ).values_list('id', flat=True))
+        Follow.objects.bulk_create(
+            Follow(user_id=reader, author_id=author)
+            for reader in readers
+            for author in rnd.sample(
+                author_ids, min(options['follows'], len(author_ids)))
+        )
+        return readers, author_ids
+
+    def report(self, readers, author_ids, repeat):
+        rnd = random.Random(1)
+
+        def pair():
+            return rnd.choice(readers), rnd.choice(author_ids)
+
+        def query():
+            reader, author = pair()
+            Follow.objects.filter(user_id=reader, author_id=author).exists()
+
+        def cached():
+            is_following(*pair())
+
+        def cold():
+            reader, author = pair()
+            cache.delete(_key(reader))
+            is_following(reader, author)
+
+        for name, func in (('Follow.exists()', query),
+                           ('is_following, холодный кэш', cold),
+                           ('is_following, тёплый кэш', cached)):
+            median, p95 = timed(func, repeat)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: median {median * 1e6:.0f} us, '
+                f'p95 {p95 * 1e6:.0f} us'
+            ))
+        size = len(followed_author_ids(readers[0]).tobytes())
+        self.stdout.write(f'Запись в кэше: {size} байт на читателя')
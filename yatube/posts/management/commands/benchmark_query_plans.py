@@ -0,0 +1,119 @@
+import statistics
+import time
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, migrations, transaction
+
+from posts.feed import feed_posts
+from posts.models import Comment, Follow, Post
+
+INDEXES_MIGRATION = 'posts.migrations.0010_indexes_and_unique_follow'
+
+
+def migration_indexes():
+    """Имена индексов, которые добавляет миграция с составными индексами.
+
+    Ограничение unique_follow из той же миграции в SQLite не удалить без
+    пересборки таблицы, поэтому при сравнении оно остаётся.
+    """
+    operations = import_module(INDEXES_MIGRATION).Migration.operations
+    return [operation.index.name for operation in operations
+            if isinstance(operation, migrations.AddIndex)]
+
+
+@contextmanager
+def without_indexes(names):
+    """Удаляет индексы names на время блока.
+
+    Индексы удаляются в транзакции, которая в конце откатывается: DDL в
+    SQLite транзакционный, поэтому индексы вернутся, даже если процесс
+    прервут. Миграции и данные не трогаются, но до конца блока база
+    заблокирована на запись.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(
+                    f'DROP INDEX IF EXISTS {connection.ops.quote_name(name)}')
+        yield
+        transaction.set_rollback(True)
+
+
+class Command(BaseCommand):
+    help = ('Показывает EXPLAIN QUERY PLAN и время основных запросов '
+            'представлений posts; с --compare сравнивает их с замером без '
+            'составных индексов миграции 0010.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', action='store_true',
+                            help='Перед замером наполнить базу данными.')
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--follows', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--compare', action='store_true',
+                            help='Сначала замерить те же запросы без '
+                                 'индексов миграции 0010: они удаляются в '
+                                 'транзакции, которая затем откатывается.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда рассчитана на SQLite.')
+        if options['seed']:
+            call_command('seed', users=options['users'],
+                         posts=options['posts'],
+                         comments=options['comments'],
+                         follows=options['follows'], stdout=self.stdout)
+        if not Post.objects.exists():
+            raise CommandError('База пуста: запустите команду с --seed.')
+
+        queries = self.queries()
+        if options['compare']:
+            with without_indexes(migration_indexes()):
+                self.stdout.write(self.style.MIGRATE_HEADING('До индексов'))
+                self.report(queries, options['repeat'])
+            self.stdout.write(self.style.MIGRATE_HEADING('После индексов'))
+        self.report(queries, options['repeat'])
+
+    def queries(self):
+        post = Post.objects.order_by('?').only('id', 'author', 'group')[0]
+        group_id = (Post.objects.exclude(group=None)
+                    .values_list('group_id', flat=True).first())
+        follow = Follow.objects.order_by('?').first()
+        reader = follow.user if follow else post.author
+        return {
+            'index': Post.objects.select_related('group')[:10],
+            'group_posts': Post.objects.filter(group_id=group_id)[:10],
+            'profile': Post.objects.filter(author_id=post.author_id)[:10],
+            'profile_count': Post.objects.filter(
+                author_id=post.author_id).order_by().values('pk'),
+            'post_comments': Comment.objects.filter(
+                post_id=post.pk).order_by('created'),
+            'is_following': Follow.objects.filter(
+                user_id=reader.pk, author_id=post.author_id
+            ).values('pk')[:1],
+            'follow_index': feed_posts(reader)[:10],
+        }
+
+    def report(self, queries, repeat):
+        for name, queryset in queries.items():
+            sql, params = queryset.query.get_compiler(
+                connection=connection).as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = [row[-1] for row in cursor.fetchall()]
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    timings.append(time.perf_counter() - started)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: median {statistics.median(timings) * 1000:.3f} ms'
+            ))
+            for line in plan:
+                self.stdout.write(f'    {line}')
@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import statistics
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.feed import feed_posts
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import encode_cursor
+from posts.views import COUNT_POST
+
+User = get_user_model()
+
+BASELINE_PATH = os.path.join(settings.BASE_DIR, 'benchmark_views.json')
+
+# Маршруты, которые без входа отвечают редиректом или 401.
+LOGIN_REQUIRED = {'follow_index', 'post_create', 'post_edit', 'add_comment',
+                  'profile_follow', 'profile_unfollow', 'api_follow_posts'}
+
+Case = namedtuple('Case', 'name route url user method data prepare')
+
+
+def percentile(timings, share):
+    return timings[min(len(timings) - 1, int(len(timings) * share))]
+
+
+def last_page(queryset, cursor, field='pub_date'):
+    """Строка запроса последней страницы: номер страницы для обычной
+    пагинации или курсор для курсорной; None, если страница одна."""
+    count = queryset.count()
+    if count <= COUNT_POST:
+        return None
+    if not cursor:
+        return f'?page={(count - 1) // COUNT_POST + 1}'
+    return f'?after={encode_cursor(queryset[count - COUNT_POST - 1], field)}'
+
+
+def route_cases(route, args, reader, query='', page='', users=None,
+                method='get', data=None, prepare=None):
+    """Запросы к маршруту гостем и читателем, если вход не обязателен."""
+    if users is None:
+        users = [reader] if route in LOGIN_REQUIRED else [None, reader]
+    return [
+        Case(name=f'{route}{page} [{"anonymous" if user is None else "user"}]',
+             route=route, url=reverse(f'posts:{route}', args=args) + query,
+             user=user, method=method, data=data, prepare=prepare)
+        for user in users
+    ]
+
+
+def busiest(queryset, relation):
+    return queryset.annotate(count=Count(relation)).order_by('-count')[0]
+
+
+def build_cases():
+    """Запросы ко всем маршрутам posts на данных из базы: самые крупные
+    автор, сообщество, пост и лента, первая и последняя страницы."""
+    reader = busiest(User.objects, 'follower')
+    author = busiest(User.objects.exclude(pk=reader.pk), 'posts')
+    group = busiest(Group.objects, 'posts')
+    post = busiest(Post.objects, 'comments')
+    word = max(re.findall(r'\w+', post.text), key=len)
+    views_cursor = settings.POSTS_CURSOR_PAGINATION
+    comments = Comment.objects.filter(post=post).order_by('created', 'pk')
+
+    lists = {
+        'index': ((), Post.objects.all(), views_cursor),
+        'group_list': ((group.slug,), group.posts.all(), views_cursor),
+        'profile': ((author.username,), author.posts.all(), views_cursor),
+        'follow_index': ((), feed_posts(reader), views_cursor),
+        'api_posts': ((), Post.objects.all(), True),
+        'api_group_posts': ((group.slug,), group.posts.all(), True),
+        'api_author_posts': ((author.username,), author.posts.all(), True),
+        'api_follow_posts': ((), feed_posts(reader), True),
+    }
+    single = {
+        'search': ((), f'?q={word}'),
+        'post_details': ((post.pk,), ''),
+        'post_comments': ((post.pk,), ''),
+        'api_post_comments': ((post.pk,), ''),
+        'post_create': ((), ''),
+    }
+
+    def follow():
+        Follow.objects.get_or_create(user=reader, author=author)
+
+    def unfollow():
+        Follow.objects.filter(user=reader, author=author).delete()
+
+    cases = []
+
+    def add(route, args, *options, **kwargs):
+        cases.extend(route_cases(route, args, reader, *options, **kwargs))
+
+    for route, (args, queryset, cursor) in lists.items():
+        add(route, args)
+        query = last_page(queryset, cursor)
+        if query:
+            add(route, args, query, page=' last')
+    for route, (args, query) in single.items():
+        add(route, args, query)
+    for route in ('post_details', 'post_comments', 'api_post_comments'):
+        query = last_page(comments, True, 'created')
+        if query:
+            add(route, (post.pk,), query, page=' last')
+    own_post = Post.objects.filter(author=reader).first() or post
+    add('post_edit', (own_post.pk,), users=[own_post.author])
+    add('add_comment', (post.pk,), method='post',
+        data={'text': 'Комментарий для замера'})
+    add('profile_follow', (author.username,), prepare=unfollow)
+    add('profile_unfollow', (author.username,), prepare=follow)
+    return cases
+
+
+class Command(BaseCommand):
+    help = ('Замеряет p50/p95/p99 времени ответа и число SQL-запросов для '
+            'всех маршрутов posts на заполненной базе (см. seed), гостем и '
+            'пользователем, на первой и последней страницах. Сравнивает с '
+            'сохранённым базовым замером и завершается ошибкой при '
+            'регрессии или без базового замера. Изменения данных '
+            'откатываются, кэш очищается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--baseline', default=BASELINE_PATH,
+                            help='Файл базового замера.')
+        parser.add_argument('--save', action='store_true',
+                            help='Записать замер как новый базовый.')
+        parser.add_argument('--metric', choices=('p50', 'p95', 'p99'),
+                            default='p50',
+                            help='По какому перцентилю искать регрессии; '
+                                 'p95 и p99 устойчивы только при большом '
+                                 '--repeat на ненагруженной машине.')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Допустимый рост времени, доля от '
+                                 'базового.')
+        parser.add_argument('--min-delta', type=float, default=1.0,
+                            help='Рост меньше стольких мс не считается '
+                                 'регрессией.')
+        parser.add_argument('--cold', action='store_true',
+                            help='Очищать кэш перед каждым запросом.')
+
+    def handle(self, *args, **options):
+        if not Post.objects.exists():
+            raise CommandError('База пуста: заполните её командой seed.')
+        if not options['save'] and not os.path.exists(options['baseline']):
+            raise CommandError(
+                f'Базового замера {options["baseline"]} нет: сначала '
+                f'запустите команду с --save.')
+        try:
+            with transaction.atomic():
+                results = self.run(options)
+                transaction.set_rollback(True)
+        finally:
+            cache.clear()
+
+        if options['save']:
+            with open(options['baseline'], 'w', encoding='utf-8') as stream:
+                json.dump(results, stream, ensure_ascii=False, indent=2,
+                          sort_keys=True)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовый замер записан в {options["baseline"]}'))
+            return
+        with open(options['baseline'], encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        failures = list(self.regressions(results, baseline, options))
+        if failures:
+            raise CommandError('Регрессии:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def run(self, options):
+        clients = {}
+        results = {}
+        for case in build_cases():
+            if case.user not in clients:
+                clients[case.user] = Client(SERVER_NAME='localhost')
+                if case.user is not None:
+                    clients[case.user].force_login(case.user)
+            result = self.measure(clients[case.user], case, options)
+            results[case.name] = result
+            self.stdout.write(
+                f'{case.name}: p50 {result["p50"]:.2f} мс, '
+                f'p95 {result["p95"]:.2f} мс, p99 {result["p99"]:.2f} мс, '
+                f'запросов {result["queries"]}'
+            )
+        return results
+
+    def measure(self, client, case, options):
+        timings = []
+        queries = []
+        for number in range(options['warmup'] + options['repeat']):
+            if case.prepare:
+                case.prepare()
+            if options['cold']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = getattr(client, case.method)(case.url, case.data)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{case.name}: {case.url} ответил '
+                    f'{response.status_code}')
+            if number >= options['warmup']:
+                timings.append(elapsed * 1000)
+                queries.append(len(context))
+        timings.sort()
+        return {
+            'p50': round(statistics.median(timings), 3),
+            'p95': round(percentile(timings, 0.95), 3),
+            'p99': round(percentile(timings, 0.99), 3),
+            'queries': statistics.median_low(queries),
+        }
+
+    def regressions(self, results, baseline, options):
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                yield f'{name}: нет в базовом замере, обновите его --save'
+                continue
+            if result['queries'] > base['queries']:
+                yield (f'{name}: запросов {base["queries"]} → '
+                       f'{result["queries"]}')
+            metric = options['metric']
+            limit = max(base[metric] * (1 + options['threshold']),
+                        base[metric] + options['min_delta'])
+            if result[metric] > limit:
+                yield (f'{name}: {metric} {base[metric]:.2f} → '
+                       f'{result[metric]:.2f} мс')
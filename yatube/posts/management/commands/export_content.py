@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, OutputWrapper
+
+from posts.export import EXPORT_CHUNK_SIZE, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = ('Выгружает все посты с автором, сообществом и комментариями '
+            'в JSONL или CSV, построчно и с постоянным расходом памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=tuple(FORMATS),
+                            default='jsonl')
+        parser.add_argument('--output', default='-',
+                            help='Файл для выгрузки; «-» — stdout.')
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE,
+                            help='Постов в одном keyset-запросе.')
+
+    def handle(self, *args, **options):
+        lines = export_lines(options['format'],
+                             chunk_size=options['chunk_size'])
+        started = time.perf_counter()
+        if options['output'] == '-':
+            count = self.write(lines, self.stdout)
+        else:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as stream:
+                count = self.write(lines, OutputWrapper(stream))
+        elapsed = time.perf_counter() - started
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено строк: {count} за {elapsed:.1f} с'))
+
+    def write(self, lines, stream):
+        count = 0
+        for count, line in enumerate(lines, 1):
+            stream.write(line, ending='')
+        return count
@@ -0,0 +1,296 @@
+import csv
+import itertools
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import counters, follow_graph
+from posts.bulk import bulk_create
+from posts.caching import (bump_page_versions, follows_scope, group_scope,
+                           index_scope, profile_scope)
+from posts.feed import backfill_feeds, fan_out_posts
+from posts.models import Comment, Follow, Group, Post, ThumbnailTask
+
+User = get_user_model()
+
+KINDS = ('posts', 'comments', 'follows')
+
+
+def _parse(stream, data_format):
+    if data_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+
+def read_records(path, data_format):
+    """Читает записи JSONL или CSV потоком, не загружая файл целиком."""
+    if path == '-':
+        yield from _parse(sys.stdin, data_format)
+        return
+    with open(path, encoding='utf-8', newline='') as stream:
+        yield from _parse(stream, data_format)
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_image(value):
+    """Имя файла в хранилище; URL из старых выгрузок — без MEDIA_URL."""
+    if value and value.startswith(settings.MEDIA_URL):
+        return value[len(settings.MEDIA_URL):]
+    return value or ''
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Массово импортирует посты, комментарии или подписки из '
+            'JSONL/CSV: bulk_create пачками, транзакция на блок записей, '
+            'продолжение с --offset.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('path', help='Файл JSONL/CSV или «-» для stdin.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'),
+                            help='По умолчанию — по расширению файла.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Записей в одном bulk_create.')
+        parser.add_argument('--chunk-size', type=int, default=20000,
+                            help='Записей в одной транзакции.')
+        parser.add_argument('--offset', type=int, default=0,
+                            help='Пропустить столько первых записей, '
+                                 'чтобы продолжить прерванный импорт.')
+        parser.add_argument('--create-missing', action='store_true',
+                            help='Создавать неизвестных пользователей '
+                                 'и сообщества.')
+
+    def handle(self, *args, kind, path, **options):
+        data_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl')
+        self.verbosity = options['verbosity']
+        self.create_missing = options['create_missing']
+        self.skipped = 0
+        self.scopes = set()
+        import_batch = getattr(self, f'import_{kind}')
+        imported_hook = getattr(self, f'{kind}_imported')
+        batch_size = options['batch_size']
+
+        offset = options['offset']
+        records = itertools.islice(read_records(path, data_format),
+                                   offset, None)
+        imported = 0
+        started = time.perf_counter()
+        while True:
+            chunk = list(itertools.islice(records, options['chunk_size']))
+            if not chunk:
+                break
+            try:
+                with transaction.atomic():
+                    created = []
+                    for start in range(0, len(chunk), batch_size):
+                        created += import_batch(
+                            chunk[start:start + batch_size])
+                    imported_hook(created)
+            except IntegrityError as error:
+                raise CommandError(
+                    f'{error}. Записи начиная с {offset} не сохранены, '
+                    f'продолжить: --offset {offset}')
+            offset += len(chunk)
+            imported += len(created)
+            rate = imported / (time.perf_counter() - started)
+            self.stdout.write(
+                f'{offset}: сохранено {imported}, пропущено {self.skipped}, '
+                f'{rate:.0f} записей/с'
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {imported} записей за {elapsed:.1f} с, '
+            f'пропущено {self.skipped}'
+        ))
+
+    def skip(self, record, reason):
+        self.skipped += 1
+        if self.verbosity > 1:
+            self.stderr.write(f'Пропущено ({reason}): {record}')
+
+    def resolve_users(self, usernames):
+        """{username: id} одним запросом на пачку записей."""
+        names = set(filter(None, usernames))
+        users = dict(User.objects.filter(
+            username__in=names
+        ).values_list('username', 'id'))
+        missing = names - users.keys()
+        if missing and self.create_missing:
+            password = make_password(None)
+            User.objects.bulk_create(
+                User(username=name, password=password) for name in missing)
+            users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'id'))
+        return users
+
+    def resolve_groups(self, slugs):
+        """{slug: id} одним запросом на пачку записей."""
+        slugs = set(filter(None, slugs))
+        groups = dict(Group.objects.filter(
+            slug__in=slugs
+        ).values_list('slug', 'id'))
+        missing = slugs - groups.keys()
+        if missing and self.create_missing:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='')
+                for slug in missing)
+            groups.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'id'))
+        return groups
+
+    def import_posts(self, batch):
+        users = self.resolve_users(record.get('author') for record in batch)
+        groups = self.resolve_groups(record.get('group') for record in batch)
+        # Явные id, уже занятые в базе (в том числе постами без id из
+        # прошлых пачек), пропускаются: повторный импорт не дублирует посты.
+        used_ids = set(Post.objects.filter(
+            pk__in={parse_id(record.get('id')) for record in batch}
+        ).values_list('id', flat=True))
+        posts = []
+        for record in batch:
+            author = record.get('author')
+            group = record.get('group') or None
+            post_id = parse_id(record.get('id'))
+            if post_id in used_ids:
+                self.skip(record, 'id уже занят')
+            elif not record.get('text'):
+                self.skip(record, 'нет текста')
+            elif author not in users:
+                self.skip(record, 'неизвестный автор')
+            elif group and group not in groups:
+                self.skip(record, 'неизвестное сообщество')
+            else:
+                try:
+                    pub_date = parse_date(record.get('pub_date'))
+                except ValueError as error:
+                    self.skip(record, error)
+                    continue
+                if post_id is not None:
+                    used_ids.add(post_id)
+                posts.append(Post(
+                    id=post_id,
+                    text=record['text'],
+                    author_id=users[author],
+                    group_id=groups.get(group),
+                    image=parse_image(record.get('image')),
+                    pub_date=pub_date,
+                    updated=pub_date,
+                ))
+                self.scopes.add(profile_scope(author))
+                if group:
+                    self.scopes.add(group_scope(group))
+        return bulk_create(Post, posts)
+
+    def posts_imported(self, posts):
+        fan_out_posts(posts)
+        ThumbnailTask.objects.bulk_create(
+            ThumbnailTask(image=post.image.name)
+            for post in posts if post.image)
+        self.scopes.add(index_scope())
+        self.on_commit(lambda: counters.posts_imported(posts))
+
+    def import_comments(self, batch):
+        users = self.resolve_users(record.get('author') for record in batch)
+        post_ids = set(Post.objects.filter(
+            pk__in={parse_id(record.get('post')) for record in batch}
+        ).values_list('id', flat=True))
+        comments = []
+        for record in batch:
+            post_id = parse_id(record.get('post'))
+            if not record.get('text'):
+                self.skip(record, 'нет текста')
+            elif record.get('author') not in users:
+                self.skip(record, 'неизвестный автор')
+            elif post_id not in post_ids:
+                self.skip(record, 'неизвестный пост')
+            else:
+                try:
+                    created = parse_date(record.get('created'))
+                except ValueError as error:
+                    self.skip(record, error)
+                    continue
+                comments.append(Comment(
+                    post_id=post_id,
+                    author_id=users[record['author']],
+                    text=record['text'],
+                    created=created,
+                ))
+        return bulk_create(Comment, comments)
+
+    def comments_imported(self, comments):
+        # Комментарии не входят ни в счётчики, ни в кэш страниц.
+        pass
+
+    def import_follows(self, batch):
+        users = self.resolve_users(itertools.chain.from_iterable(
+            (record.get('user'), record.get('author')) for record in batch))
+        follows = {}
+        for record in batch:
+            user_id = users.get(record.get('user'))
+            author_id = users.get(record.get('author'))
+            if user_id is None or author_id is None:
+                self.skip(record, 'неизвестный пользователь')
+            elif user_id == author_id:
+                self.skip(record, 'подписка на себя')
+            else:
+                follows[user_id, author_id] = Follow(user_id=user_id,
+                                                     author_id=author_id)
+        Follow.objects.bulk_create(follows.values(), ignore_conflicts=True)
+        return list(follows.values())
+
+    def follows_imported(self, follows):
+        backfill_feeds((follow.user_id, follow.author_id)
+                       for follow in follows)
+        readers = {follow.user_id: follow for follow in follows}
+        self.scopes.update(follows_scope(user_id) for user_id in readers)
+
+        def forget():
+            for follow in readers.values():
+                counters.follow_changed(follow)
+                follow_graph.follow_changed(follow)
+        self.on_commit(forget)
+
+    def on_commit(self, func):
+        """Сбрасывает кэши после фиксации блока, как это делают сигналы
+        моделей, которые bulk_create не вызывает."""
+        scopes, self.scopes = self.scopes, set()
+
+        def callback():
+            func()
+            bump_page_versions(*scopes)
+        transaction.on_commit(callback)
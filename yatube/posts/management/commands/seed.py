@@ -0,0 +1,238 @@
+import io
+import itertools
+import random
+import time
+from array import array
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+from PIL import Image, ImageDraw
+
+from posts.bulk import bulk_create
+from posts.feed import backfill_feeds
+from posts.models import Comment, Follow, Group, Post, ThumbnailTask
+
+User = get_user_model()
+
+
+def zipf_weights(count, alpha):
+    """Накопленные веса степенного распределения для random.choices."""
+    return list(itertools.accumulate(
+        1 / (rank + 1) ** alpha for rank in range(count)))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу правдоподобными данными для замеров: '
+            'пользователи, сообщества, посты со степенным распределением '
+            'по авторам, граф подписок, комментарии и изображения. '
+            'Одинаковый --seed даёт одинаковые данные.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Среднее число подписок пользователя.')
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help='Показатель степенного распределения '
+                                 'активности и популярности авторов.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='За сколько дней распределить посты.')
+        parser.add_argument('--images', type=int, default=0,
+                            help='Сколько разных изображений создать.')
+        parser.add_argument('--image-share', type=float, default=0.1,
+                            help='Доля постов с изображением.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rnd = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.saved_images = []
+        try:
+            with transaction.atomic():
+                users = self.stage('Пользователи', self.seed_users, options)
+                groups = self.stage('Сообщества', self.seed_groups, options)
+                images = self.stage('Изображения', self.seed_images,
+                                    options)
+                posts = self.stage('Посты', self.seed_posts, options,
+                                   users, groups, images)
+                self.stage('Подписки', self.seed_follows, options, users)
+                self.stage('Комментарии', self.seed_comments, options,
+                           users, posts)
+        except BaseException:
+            # Файлы не откатываются вместе с транзакцией: без этого
+            # прерванный запуск оставил бы изображения без постов.
+            for name in self.saved_images:
+                default_storage.delete(name)
+            raise
+        # Счётчики, версии страниц и графы подписок в кэше устарели:
+        # bulk_create не вызывает сигналы моделей.
+        cache.clear()
+
+    def stage(self, name, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        count = result if isinstance(result, int) else len(result)
+        self.stdout.write(
+            f'{name}: {count} за {time.perf_counter() - started:.1f} с')
+        return result
+
+    def seed_users(self, options):
+        offset = User.objects.aggregate(last=Max('id'))['last'] or 0
+        password = make_password(None)
+        User.objects.bulk_create(
+            User(username=f'{self.fake.user_name()}_{offset + i}',
+                 first_name=self.fake.first_name(),
+                 last_name=self.fake.last_name(),
+                 password=password)
+            for i in range(options['users'])
+        )
+        ids = list(User.objects.filter(
+            pk__gt=offset).order_by('pk').values_list('id', flat=True))
+        # Самые активные авторы — случайные, а не первые по id.
+        self.rnd.shuffle(ids)
+        return ids
+
+    def seed_groups(self, options):
+        offset = Group.objects.aggregate(last=Max('id'))['last'] or 0
+        Group.objects.bulk_create(
+            Group(title=self.fake.sentence(nb_words=2).rstrip('.'),
+                  slug=f'seed-{offset + i}',
+                  description=self.fake.paragraph(nb_sentences=2))
+            for i in range(options['groups'])
+        )
+        return list(Group.objects.filter(
+            pk__gt=offset).values_list('id', flat=True))
+
+    def seed_images(self, options):
+        names = []
+        for i in range(options['images']):
+            image = Image.new('RGB', (960, 540), self.color())
+            draw = ImageDraw.Draw(image)
+            for _ in range(8):
+                x, y = self.rnd.randrange(960), self.rnd.randrange(540)
+                draw.rectangle((x, y, x + self.rnd.randrange(40, 400),
+                                y + self.rnd.randrange(40, 300)),
+                               fill=self.color())
+            content = io.BytesIO()
+            image.save(content, 'JPEG', quality=80)
+            names.append(default_storage.save(
+                f'posts/seed_{options["seed"]}_{i}.jpg',
+                ContentFile(content.getvalue())))
+            self.saved_images.append(names[-1])
+        ThumbnailTask.objects.bulk_create(
+            ThumbnailTask(image=name) for name in names)
+        return names
+
+    def color(self):
+        return tuple(self.rnd.randrange(256) for _ in range(3))
+
+    def seed_posts(self, options, users, groups, images):
+        """Посты идут по возрастанию даты, число постов автора
+        распределено по степенному закону."""
+        first_id = (Post.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+        weights = zipf_weights(len(users), options['alpha'])
+        now = timezone.now()
+        span = options['days'] * 24 * 3600
+        # Время публикации постов по возрастанию; id идут подряд с
+        # first_id, поэтому для комментариев хватает массива дат.
+        published = array('d', sorted(
+            now.timestamp() - self.rnd.uniform(0, span)
+            for _ in range(options['posts'])))
+        group_choices = groups + [None] * len(groups)
+
+        def generate():
+            for number, timestamp in enumerate(published):
+                pub_date = now + timedelta(seconds=timestamp - now.timestamp())
+                image = ''
+                if images and self.rnd.random() < options['image_share']:
+                    image = self.rnd.choice(images)
+                yield Post(
+                    id=first_id + number,
+                    text=self.fake.paragraph(
+                        nb_sentences=self.rnd.randint(1, 8)),
+                    author_id=self.rnd.choices(users, cum_weights=weights)[0],
+                    group_id=self.rnd.choice(group_choices),
+                    image=image,
+                    pub_date=pub_date,
+                    updated=pub_date,
+                )
+
+        for batch in batched(generate(), self.batch_size):
+            bulk_create(Post, batch)
+        self.first_post_id = first_id
+        return published
+
+    def seed_follows(self, options, users):
+        """Число подписок у читателя — экспоненциальное со средним
+        --follows, авторов выбирают пропорционально их популярности."""
+        weights = zipf_weights(len(users), options['alpha'])
+        created = 0
+        for readers in batched(users, max(1, self.batch_size // max(
+                1, options['follows']))):
+            follows = []
+            for user_id in readers:
+                count = min(len(users) - 1, int(self.rnd.expovariate(
+                    1 / options['follows'])) if options['follows'] else 0)
+                authors = set()
+                while len(authors) < count:
+                    author_id = self.rnd.choices(users,
+                                                 cum_weights=weights)[0]
+                    if author_id != user_id:
+                        authors.add(author_id)
+                follows += [Follow(user_id=user_id, author_id=author_id)
+                            for author_id in sorted(authors)]
+            Follow.objects.bulk_create(follows, ignore_conflicts=True)
+            backfill_feeds((follow.user_id, follow.author_id)
+                           for follow in follows)
+            created += len(follows)
+        return created
+
+    def seed_comments(self, options, users, published):
+        """Комментарии достаются в основном популярным постам и пишутся
+        после публикации поста."""
+        if not published:
+            return 0
+        popular = array('l', range(len(published)))
+        self.rnd.shuffle(popular)
+        weights = zipf_weights(len(popular), options['alpha'])
+        now = timezone.now()
+
+        def generate():
+            for _ in range(options['comments']):
+                index = self.rnd.choices(popular, cum_weights=weights)[0]
+                delay = self.rnd.expovariate(1 / 3600)
+                created = min(now.timestamp(), published[index] + delay)
+                yield Comment(
+                    post_id=self.first_post_id + index,
+                    author_id=self.rnd.choice(users),
+                    text=self.fake.sentence(
+                        nb_words=self.rnd.randint(3, 20)),
+                    created=now + timedelta(seconds=created - now.timestamp()),
+                )
+
+        for batch in batched(generate(), self.batch_size):
+            bulk_create(Comment, batch)
+        return options['comments']
@@ -0,0 +1,106 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core import metrics_store
+
+from posts.models import ThumbnailTask
+from posts.thumbnails import generate_thumbnails, mark_ready
+
+
+class Command(BaseCommand):
+    help = ('Строит миниатюры для загруженных изображений из очереди '
+            'ThumbnailTask в пуле процессов. Несколько воркеров не берут '
+            'одну задачу дважды; задача с ошибкой повторяется через '
+            '--retry-after секунд, пока не кончатся попытки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                            help='Размер пула; 0 — строить в этом процессе.')
+        parser.add_argument('--batch', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Пауза между опросами пустой очереди, с.')
+        parser.add_argument('--once', action='store_true',
+                            help='Разобрать очередь и завершиться.')
+        parser.add_argument('--retry-after', type=float, default=300.0,
+                            help='Через сколько секунд снова брать задачу '
+                                 'с ошибкой или упавшего воркера.')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='После стольких попыток задача остаётся '
+                                 'в очереди с ошибкой и больше не берётся.')
+
+    def handle(self, *args, **options):
+        pool = None
+        if options['processes']:
+            # Дочерние процессы не должны делить соединение с родителем.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=options['processes'])
+        try:
+            while True:
+                done = self.process_batch(pool, options)
+                if not done:
+                    if options['once']:
+                        break
+                    time.sleep(options['interval'])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def claim(self, options):
+        """Занимает до --batch свободных задач.
+
+        Каждая задача занимается условным UPDATE: если другой воркер
+        успел взять её раньше, обновится ноль строк и задача пропускается.
+        """
+        now = timezone.now()
+        expired = now - timedelta(seconds=options['retry_after'])
+        available = ThumbnailTask.objects.filter(
+            Q(locked_at=None) | Q(locked_at__lt=expired),
+            attempts__lt=options['max_attempts'],
+        )
+        claimed = []
+        for task in available[:options['batch']]:
+            if available.filter(pk=task.pk).update(
+                    locked_at=now, attempts=F('attempts') + 1):
+                claimed.append(task)
+        return claimed
+
+    def process_batch(self, pool, options):
+        tasks = self.claim(options)
+        if not tasks:
+            return 0
+        now = timezone.now()
+        for task in tasks:
+            if not task.attempts:
+                metrics_store.observe('yatube_upload_processing_seconds',
+                                      (now - task.created).total_seconds(),
+                                      stage='queue')
+        names = list(dict.fromkeys(task.image for task in tasks))
+        if pool is None:
+            results = map(generate_thumbnails, names)
+        else:
+            results = pool.map(generate_thumbnails, names)
+        ready = {name for name, ok in zip(names, results) if ok}
+        # Задачи с ошибкой остаются занятыми до --retry-after.
+        ThumbnailTask.objects.filter(
+            id__in=[task.id for task in tasks if task.image in ready]
+        ).delete()
+        mark_ready(ready)
+        metrics_store.flush_if_due(0)
+        self.stdout.write(
+            f'Миниатюры: {len(ready)} готово, '
+            f'{len(names) - len(ready)} с ошибкой'
+        )
+        for task in tasks:
+            if (task.image not in ready
+                    and task.attempts + 1 >= options['max_attempts']):
+                self.stderr.write(
+                    f'{task.image}: попытки кончились, задача {task.pk} '
+                    f'остаётся в очереди с ошибкой')
+        return len(tasks)
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_feed_item_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thumbnailtask',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Попытки'),
+        ),
+        migrations.AddField(
+            model_name='thumbnailtask',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взята в работу'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:52
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite добавляет поле, пересоздавая posts_post, и триггеры
+# полнотекстового индекса пропадают вместе со старой таблицей.
+FTS_SQL = import_module('posts.migrations.0012_post_search').FTS_SQL
+
+
+def enqueue_existing(apps, schema_editor):
+    # Готовность миниатюр раньше не хранилась: воркер перепроверит все
+    # картинки (уже построенные он находит в kvstore) и отметит посты.
+    Post = apps.get_model('posts', 'Post')
+    ThumbnailTask = apps.get_model('posts', 'ThumbnailTask')
+    names = Post.objects.exclude(image='').values_list(
+        'image', flat=True).distinct()
+    ThumbnailTask.objects.bulk_create(
+        (ThumbnailTask(image=name) for name in names.iterator()),
+        batch_size=300,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_post_scope_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, FTS_SQL),
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, help_text='Отмечает thumbnail_worker, когда построит все миниатюры картинки', verbose_name='Миниатюры готовы'),
+        ),
+        migrations.RunSQL(FTS_SQL, migrations.RunSQL.noop),
+        migrations.RunPython(enqueue_existing, migrations.RunPython.noop),
+    ]
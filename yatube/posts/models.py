@@ -23,10 +23,25 @@ class Post(models.Model):
         verbose_name = 'Запись'
         verbose_name_plural = 'Записи'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('-pub_date',),
+                         name='post_pub_date_idx'),
+            models.Index(fields=('author', '-pub_date'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date'),
+                         name='post_group_pub_date_idx'),
+            models.Index(fields=('-updated',), name='post_updated_idx'),
+            models.Index(fields=('author', '-updated'),
+                         name='post_author_updated_idx'),
+            models.Index(fields=('group', '-updated'),
+                         name='post_group_updated_idx'),
+        )
 
     text = models.TextField(verbose_name='Текст', help_text='Текст поста')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='Дата изменения')
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -48,6 +63,12 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы',
+        default=False,
+        help_text='Отмечает thumbnail_worker, когда построит все '
+                  'миниатюры картинки'
+    )
 
     def __str__(self):
         return self.text[:15]
@@ -57,6 +78,10 @@ class Comment(CreatedModel):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(fields=('post', 'created'),
+                         name='comment_post_created_idx'),
+        )
 
     post = models.ForeignKey(Post,
                              on_delete=models.CASCADE,
@@ -76,6 +101,10 @@ class Follow(models.Model):
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'author'),
+                                    name='unique_follow'),
+        )
 
     user = models.ForeignKey(User,
                              on_delete=models.CASCADE,
@@ -86,3 +115,55 @@ class Follow(models.Model):
                                on_delete=models.CASCADE,
                                related_name='following',
                                verbose_name='Автор')
+
+
+class FeedItem(models.Model):
+    """Запись в материализованной ленте подписок читателя.
+
+    Заполняется при публикации поста (fan-out on write) и при подписке,
+    поэтому лента читается одним диапазонным проходом по индексу.
+    """
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(fields=('user', '-pub_date', '-post'),
+                         name='feed_user_pub_date_post_idx'),
+        )
+        constraints = (
+            models.UniqueConstraint(fields=('user', 'post'),
+                                    name='unique_feed_item'),
+        )
+
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='feed',
+                             verbose_name='Читатель')
+
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='feed_items',
+                             verbose_name='Запись')
+
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+
+class ThumbnailTask(CreatedModel):
+    """Загруженное изображение, для которого воркер построит миниатюры.
+
+    Воркер занимает задачу, записывая время в locked_at и увеличивая
+    attempts, и удаляет её после успеха. Задачу, которую не удалось
+    выполнить или чей воркер упал, другой воркер возьмёт снова, когда
+    истечёт блокировка, пока не кончатся попытки.
+    """
+    class Meta:
+        verbose_name = 'Задача на миниатюры'
+        verbose_name_plural = 'Задачи на миниатюры'
+        ordering = ('id',)
+
+    image = models.CharField(max_length=255, verbose_name='Изображение')
+    attempts = models.PositiveSmallIntegerField(default=0,
+                                                verbose_name='Попытки')
+    locked_at = models.DateTimeField(null=True, blank=True,
+                                     verbose_name='Взята в работу')
@@ -0,0 +1,163 @@
+import base64
+from collections.abc import Sequence
+from functools import partial
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+def encode_cursor(obj, field='pub_date', pk='pk'):
+    """Кодирует позицию (дата, id) записи в строку для URL."""
+    raw = f'{getattr(obj, field).isoformat()}|{getattr(obj, pk)}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; для испорченного значения возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date, pk = raw.rsplit('|', 1)
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (ValueError, UnicodeError):
+        return None
+    if date is None:
+        return None
+    return date, pk
+
+
+class CountedPaginator(Paginator):
+    """Paginator, берущий общее количество из счётчика вместо COUNT(*).
+
+    count — функция без аргументов; она вызывается, только когда
+    количество действительно понадобилось.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is not None:
+            return self._count()
+        return super().count
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации: только ссылки «вперёд» и «назад».
+
+    Как и обычная страница Django, строки читаются из базы только при
+    первом обращении: fetch возвращает (строки, has_next, has_previous).
+    Поэтому страница, вывод которой взят из кэша фрагмента шаблона, не
+    стоит ни одного запроса.
+    """
+    is_cursor = True
+
+    def __init__(self, paginator, fetch):
+        self.paginator = paginator
+        self._fetch = fetch
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @cached_property
+    def _window(self):
+        return self._fetch()
+
+    @property
+    def object_list(self):
+        return self._window[0]
+
+    def has_next(self):
+        return self._window[1]
+
+    def has_previous(self):
+        return self._window[2]
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return encode_cursor(self.object_list[-1], self.paginator.field,
+                                 self.paginator.pk)
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0], self.paginator.field,
+                                 self.paginator.pk)
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (дата, id) без COUNT(*) и OFFSET.
+
+    ordering задаёт поле даты и направление: '-pub_date' — сначала новые,
+    'created' — сначала старые; pk — поле id, по которому различаются
+    записи с одной датой. Стоимость любой страницы одинакова: запрос
+    всегда упирается в индекс по (дата, id) и читает не больше
+    per_page + 1 строк.
+    """
+
+    def __init__(self, object_list, per_page, ordering='-pub_date',
+                 pk='pk'):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.field = ordering.lstrip('-')
+        self.pk = pk
+        self.descending = ordering.startswith('-')
+
+    def _seek(self, queryset, position, forward):
+        """Записи после position.
+
+        Условие записано как «дата <= d и (дата < d или id < i)», а не
+        «дата < d или (дата = d и id < i)»: на OR по дате SQLite
+        перестаёт идти по индексу и сортирует весь остаток таблицы.
+        """
+        date, pk = position
+        lookup = 'lt' if forward == self.descending else 'gt'
+        return queryset.filter(
+            Q(**{f'{self.field}__{lookup}e': date}),
+            Q(**{f'{self.field}__{lookup}': date})
+            | Q(**{f'{self.pk}__{lookup}': pk}),
+        )
+
+    def _order(self, queryset, forward):
+        sign = '-' if forward == self.descending else ''
+        return queryset.order_by(f'{sign}{self.field}', f'{sign}{self.pk}')
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        return CursorPage(self, partial(self._fetch, after, before))
+
+    def _fetch(self, after, before):
+        """Строки страницы, has_next и has_previous."""
+        limit = self.per_page + 1
+
+        if before is not None:
+            queryset = self._seek(self.object_list, before, forward=False)
+            rows = list(self._order(queryset, forward=False)[:limit])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            rows.reverse()
+            return rows, True, has_previous
+
+        queryset = self.object_list
+        if after is not None:
+            queryset = self._seek(queryset, after, forward=True)
+        rows = list(self._order(queryset, forward=True)[:limit])
+        has_next = len(rows) > self.per_page
+        return rows[:self.per_page], has_next, after is not None
@@ -0,0 +1,132 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts хранит только токены (external content) и
+обновляется триггерами на posts_post, поэтому видит и bulk_create, и
+QuerySet.update(). Если миграция пересоздаст таблицу posts_post, триггеры
+пропадут вместе со старой таблицей — их вернёт rebuild_search_index.
+"""
+import base64
+
+from django.db import connection
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+from .paginators import CursorPage
+
+FTS_TABLE = 'posts_post_fts'
+
+SCHEMA_SQL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, content='posts_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def rebuild_index():
+    """Создаёт недостающие таблицу и триггеры и переиндексирует посты."""
+    with connection.cursor() as cursor:
+        for statement in SCHEMA_SQL:
+            cursor.execute(statement)
+        cursor.execute(REBUILD_SQL)
+
+
+def match_expression(query):
+    """Превращает ввод пользователя в безопасный запрос FTS5.
+
+    Каждое слово берётся в кавычки, поэтому операторы и спецсимволы
+    FTS5 ищутся как обычный текст; слова объединяются через AND.
+    """
+    words = query.split()
+    return ' '.join('"{}"'.format(word.replace('"', '""')) for word in words)
+
+
+def encode_cursor(score, pk):
+    raw = f'{score!r}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, pk = raw.rsplit('|', 1)
+        return float(score), int(pk)
+    except (ValueError, UnicodeError):
+        return None
+
+
+def filter_matching(queryset, query):
+    """Оставляет в queryset постов только подходящие под запрос."""
+    return queryset.annotate(fts_match=RawSQL(
+        f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s)',
+        (match_expression(query),),
+        output_field=BooleanField(),
+    )).filter(fts_match=True)
+
+
+class SearchPage(CursorPage):
+    """Страница результатов поиска: только переход «вперёд»."""
+
+    def __init__(self, object_list, next_cursor):
+        super().__init__(
+            None, lambda: (object_list, next_cursor is not None, False))
+        self._next_cursor = next_cursor
+
+    @property
+    def next_cursor(self):
+        return self._next_cursor
+
+    @property
+    def previous_cursor(self):
+        return None
+
+
+def search_posts(query, per_page, after=None):
+    """Посты по релевантности (bm25), keyset-пагинация по (score, id)."""
+    expression = match_expression(query)
+    if not expression:
+        return SearchPage([], None)
+    sql = (f'SELECT rowid, bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+           f'WHERE {FTS_TABLE} MATCH %s')
+    params = [expression]
+    cursor_position = decode_cursor(after) if after else None
+    if cursor_position is not None:
+        score, pk = cursor_position
+        sql += (f' AND (bm25({FTS_TABLE}) > %s '
+                f'OR (bm25({FTS_TABLE}) = %s AND rowid > %s))')
+        params += [score, score, pk]
+    sql += f' ORDER BY bm25({FTS_TABLE}), rowid LIMIT %s'
+    params.append(per_page + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = Post.objects.select_related('author', 'group').in_bulk(
+        [pk for pk, _ in rows])
+    object_list = [posts[pk] for pk, _ in rows if pk in posts]
+    next_cursor = None
+    if has_next:
+        last_pk, last_score = rows[-1]
+        next_cursor = encode_cursor(last_score, last_pk)
+    return SearchPage(object_list, next_cursor)
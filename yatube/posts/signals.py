@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, follow_graph
+from .caching import (GROUPS_SCOPE, bump_page_versions, follows_scope,
+                      group_scope, index_scope, profile_scope)
+from .feed import backfill_feed, fan_out_post, trim_feed
+from .models import Follow, Group, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся на страницах с его постами.
+AUTHOR_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _bump_post_pages(post, group_slugs):
+    scopes = {index_scope(), profile_scope(post.author.username)}
+    scopes.update(group_scope(slug) for slug in group_slugs if slug)
+    bump_page_versions(*scopes)
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    instance._old_group_id = instance._old_group_slug = None
+    if instance.pk:
+        old = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', 'group__slug').first()
+        if old:
+            instance._old_group_id, instance._old_group_slug = old
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    group_slug = instance.group.slug if instance.group_id else None
+    if created:
+        fan_out_post(instance)
+        counters.post_added(instance)
+    elif instance._old_group_id != instance.group_id:
+        counters.post_regrouped(instance._old_group_id, instance.group_id)
+    _bump_post_pages(instance, (group_slug, instance._old_group_slug))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.post_added(instance, delta=-1)
+    group_slug = instance.group.slug if instance.group_id else None
+    _bump_post_pages(instance, (group_slug,))
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields=None, **kwargs):
+    instance._old_author_fields = None
+    if instance.pk and (update_fields is None
+                        or set(update_fields) & set(AUTHOR_FIELDS)):
+        instance._old_author_fields = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*AUTHOR_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Переименование автора сбрасывает закэшированные страницы с его
+    постами; сохранение last_login при входе их не трогает."""
+    old = getattr(instance, '_old_author_fields', None)
+    if created or old is None:
+        return
+    if old == tuple(getattr(instance, field) for field in AUTHOR_FIELDS):
+        return
+    slugs = Group.objects.filter(
+        posts__author=instance
+    ).values_list('slug', flat=True).distinct()
+    bump_page_versions(index_scope(), profile_scope(old[0]),
+                       profile_scope(instance.username),
+                       *(group_scope(slug) for slug in slugs))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_page_versions(GROUPS_SCOPE)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        backfill_feed(instance.user_id, instance.author_id)
+        counters.follow_changed(instance)
+        follow_graph.follow_changed(instance)
+        bump_page_versions(follows_scope(instance.user_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    trim_feed(instance.user_id, instance.author_id)
+    counters.follow_changed(instance)
+    follow_graph.follow_changed(instance)
+    bump_page_versions(follows_scope(instance.user_id))
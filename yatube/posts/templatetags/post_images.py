@@ -0,0 +1,37 @@
+from django import template
+
+from posts.thumbnails import POST_IMAGE_SIZES, image_variants
+
+register = template.Library()
+
+
+def _srcset(thumbnails):
+    return ', '.join(f'{thumb.url} {thumb.width}w' for thumb in thumbnails)
+
+
+@register.inclusion_tag('posts/includes/responsive_image.html')
+def responsive_image(post, css_class='card-img my-2'):
+    """Картинка поста с srcset по ширинам, WebP-источником
+    и ленивой загрузкой.
+
+    Миниатюры выводятся, только когда thumbnail_worker отметил их
+    готовыми; до того — исходное изображение.
+    """
+    image = post.image
+    if not image:
+        return {}
+    context = {'css_class': css_class}
+    if not post.thumbnails_ready:
+        context['src'] = image.url
+        return context
+    variants = image_variants(image)
+    jpeg = variants['JPEG']
+    context.update({
+        'src': jpeg[-1].url,
+        'width': jpeg[-1].width,
+        'height': jpeg[-1].height,
+        'srcset': _srcset(jpeg),
+        'webp_srcset': _srcset(variants.get('WEBP', ())),
+        'sizes': POST_IMAGE_SIZES,
+    })
+    return context
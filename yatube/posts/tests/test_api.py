@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.api import API_PAGE_SIZE
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='test-slug',
+            description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Текст поста {i}', author=cls.user, group=cls.group)
+            for i in range(API_PAGE_SIZE + 3)
+        )
+        cls.post = Post.objects.create(text='Последний пост', author=cls.user)
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(ApiTests.reader)
+
+    def test_endpoints_return_json_pages(self):
+        """Все ленты отдаются в JSON постранично по курсору."""
+        endpoints = (
+            (self.guest_client, reverse('posts:api_posts'), True),
+            (self.guest_client,
+             reverse('posts:api_group_posts', kwargs={'slug': 'test-slug'}),
+             True),
+            (self.guest_client,
+             reverse('posts:api_author_posts',
+                     kwargs={'username': 'HasNoName'}), True),
+            (self.reader_client, reverse('posts:api_follow_posts'), True),
+            (self.guest_client,
+             reverse('posts:api_post_comments',
+                     kwargs={'post_id': ApiTests.post.pk}), False),
+        )
+        for client, url, has_next in endpoints:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                data = response.json()
+                self.assertEqual(bool(data['next']), has_next)
+                self.assertIsNone(data['previous'])
+                if has_next:
+                    self.assertEqual(len(data['results']), API_PAGE_SIZE)
+                    second = client.get(url, {'after': data['next']}).json()
+                    self.assertTrue(second['results'])
+                    self.assertFalse(
+                        {post['id'] for post in data['results']}
+                        & {post['id'] for post in second['results']}
+                    )
+
+    def test_post_serialization(self):
+        """Пост сериализуется компактно и с нужными полями."""
+        response = self.guest_client.get(reverse('posts:api_posts'))
+        self.assertNotIn(b': ', response.content)
+        post = response.json()['results'][0]
+        self.assertEqual(post['id'], ApiTests.post.pk)
+        self.assertEqual(post['author'], 'HasNoName')
+        self.assertIsNone(post['group'])
+        self.assertIsNone(post['image'])
+
+    def test_etag_conditional_get(self):
+        """Неизменившаяся страница отдаёт 304, изменившаяся — новый ETag."""
+        url = reverse('posts:api_posts')
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        Post.objects.create(text='Новый пост', author=ApiTests.user)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_follow_feed_requires_auth(self):
+        """Лента подписок недоступна анониму."""
+        response = self.guest_client.get(reverse('posts:api_follow_posts'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from posts import urls
+from posts.follow_graph import followed_author_ids
+from posts.management.commands.benchmark_views import build_cases
+from posts.models import Comment, Follow, Post, ThumbnailTask
+
+User = get_user_model()
+
+
+class BenchmarkViewsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('seed', users=20, groups=2, posts=100, comments=100,
+                     follows=5, stdout=StringIO())
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.baseline = os.path.join(self.directory, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def call(self, *args):
+        call_command('benchmark_views', '--repeat', '2', '--warmup', '0',
+                     '--baseline', self.baseline, *args, stdout=StringIO())
+
+    def test_cases_cover_every_route(self):
+        """Замер покрывает все маршруты posts."""
+        self.assertEqual({case.route for case in build_cases()},
+                         {pattern.name for pattern in urls.urlpatterns})
+
+    def test_missing_baseline_fails(self):
+        """Без базового замера проверка — ошибка, а не молчаливый успех."""
+        with self.assertRaisesMessage(CommandError, 'сначала запустите'):
+            self.call()
+        self.call('--save')
+        with open(self.baseline, encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        del baseline['index [user]']
+        with open(self.baseline, 'w', encoding='utf-8') as stream:
+            json.dump(baseline, stream)
+        with self.assertRaisesMessage(
+                CommandError, 'index [user]: нет в базовом замере'):
+            self.call('--threshold', '100')
+
+    def test_query_regression_fails(self):
+        """Рост числа запросов относительно базового замера — ошибка,
+        а данные, изменённые замером, откатываются."""
+        counts = (Comment.objects.count(), Follow.objects.count())
+        self.call('--save')
+        self.assertEqual((Comment.objects.count(), Follow.objects.count()),
+                         counts)
+        with open(self.baseline, encoding='utf-8') as stream:
+            baseline = json.load(stream)
+        self.assertIn('index last [anonymous]', baseline)
+        baseline['index [user]']['queries'] -= 1
+        with open(self.baseline, 'w', encoding='utf-8') as stream:
+            json.dump(baseline, stream)
+        with self.assertRaisesMessage(CommandError, 'index [user]: запросов'):
+            self.call('--threshold', '100')
+
+
+class BenchmarkQueryPlansTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('seed', users=10, groups=2, posts=50, comments=20,
+                     follows=3, stdout=StringIO())
+
+    def test_compare_keeps_database(self):
+        """--compare снимает индексы в транзакции и откатывает её:
+        индексы и данные базы остаются на месте."""
+        ThumbnailTask.objects.create(image='posts/pending.jpg')
+        out = StringIO()
+        call_command('benchmark_query_plans', '--compare', '--repeat', '1',
+                     stdout=out)
+        before, after = out.getvalue().split('После индексов')
+        self.assertNotIn('post_pub_date_idx', before)
+        self.assertIn('post_pub_date_idx', after)
+        self.assertTrue(ThumbnailTask.objects.exists())
+        with connection.cursor() as cursor:
+            indexes = connection.introspection.get_constraints(
+                cursor, Post._meta.db_table)
+        self.assertIn('post_pub_date_idx', indexes)
+
+
+class BenchmarkFollowGraphTests(TestCase):
+
+    def test_keeps_cache_of_other_users(self):
+        """Замер не очищает общий кэш и не оставляет в нём записей
+        графа откаченных читателей."""
+        cache.set('unrelated', 'value')
+        call_command('benchmark_follow_graph', '--authors', '20',
+                     '--readers', '3', '--follows', '5', '--repeat', '5',
+                     stdout=StringIO())
+        self.assertEqual(cache.get('unrelated'), 'value')
+        # Новые пользователи получают id откаченных авторов и читателей.
+        for i in range(23):
+            user = User.objects.create_user(username=f'after_benchmark{i}')
+            self.assertEqual(list(followed_author_ids(user.pk)), [])
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from posts import counters
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='test-slug',
+            description='Описание'
+        )
+        cls.second_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second-slug',
+            description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_counters_follow_signals(self):
+        """Счётчики постов обновляются при создании, смене группы
+        и удалении поста."""
+        self.assertEqual(counters.all_posts_count(), 0)
+        self.assertEqual(counters.author_posts_count(self.user.pk), 0)
+        self.assertEqual(counters.group_posts_count(self.group.pk), 0)
+        post = Post.objects.create(
+            text='Текст поста', author=self.user, group=self.group)
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.all_posts_count(), 1)
+            self.assertEqual(counters.author_posts_count(self.user.pk), 1)
+            self.assertEqual(counters.group_posts_count(self.group.pk), 1)
+        post.group = self.second_group
+        post.save()
+        self.assertEqual(counters.group_posts_count(self.group.pk), 0)
+        self.assertEqual(counters.group_posts_count(self.second_group.pk), 1)
+        post.delete()
+        self.assertEqual(counters.all_posts_count(), 0)
+        self.assertEqual(counters.author_posts_count(self.user.pk), 0)
+        self.assertEqual(counters.group_posts_count(self.second_group.pk), 0)
+
+    def test_feed_counter(self):
+        """Счётчик ленты учитывает подписки и новые посты."""
+        Post.objects.create(text='Текст поста', author=self.user)
+        self.assertEqual(counters.feed_posts_count(self.reader.pk), 0)
+        Follow.objects.create(user=self.reader, author=self.user)
+        self.assertEqual(counters.feed_posts_count(self.reader.pk), 1)
+        Post.objects.create(text='Второй пост', author=self.user)
+        self.assertEqual(counters.feed_posts_count(self.reader.pk), 2)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(counters.feed_posts_count(self.reader.pk), 0)
@@ -0,0 +1,81 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug',
+                                         description='Описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user,
+                                group=cls.group if i % 2 else None)
+            for i in range(5)
+        ]
+        Comment.objects.create(post=cls.posts[3], author=cls.user,
+                               text='Комментарий')
+
+    def test_command_streams_posts_with_comments(self):
+        """Команда выгружает все посты блоками, с автором, сообществом
+        и комментариями."""
+        output = StringIO()
+        call_command('export_content', '--chunk-size', '2', stdout=output,
+                     stderr=StringIO())
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in rows],
+                         [post.pk for post in ExportTests.posts])
+        self.assertEqual(rows[3]['group'], 'test-slug')
+        self.assertEqual(rows[3]['author'], 'HasNoName')
+        self.assertEqual([comment['text'] for comment in rows[3]['comments']],
+                         ['Комментарий'])
+
+    def test_export_import_round_trip_keeps_image(self):
+        """Картинка выгружается именем файла и после импорта указывает
+        на тот же файл."""
+        Post.objects.filter(pk=ExportTests.posts[0].pk).update(
+            image='posts/small.jpeg')
+        output = StringIO()
+        call_command('export_content', stdout=output, stderr=StringIO())
+        self.assertEqual(json.loads(output.getvalue().splitlines()[0])[
+            'image'], 'posts/small.jpeg')
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl',
+                                         encoding='utf-8') as stream:
+            stream.write(output.getvalue())
+            stream.flush()
+            Post.objects.all().delete()
+            call_command('import_content', 'posts', stream.name,
+                         stdout=StringIO())
+        image = Post.objects.get(pk=ExportTests.posts[0].pk).image
+        self.assertEqual(image.name, 'posts/small.jpeg')
+        self.assertEqual(image.url, f'{settings.MEDIA_URL}posts/small.jpeg')
+
+    def test_admin_action_downloads_csv(self):
+        """Действие админки отдаёт выбранные посты потоковым CSV."""
+        client = Client()
+        client.force_login(ExportTests.admin)
+        selected = [post.pk for post in ExportTests.posts[:2]]
+        response = client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'export_csv',
+            '_selected_action': selected,
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual([int(row['id']) for row in rows], selected)
@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from posts.follow_graph import followed_author_ids, is_following
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.authors = [User.objects.create_user(username=f'author{i}')
+                       for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_follow_set_is_cached_and_kept_in_sync(self):
+        """Подписки читаются из кэша одним запросом и обновляются
+        при подписке и отписке."""
+        reader = FollowGraphTests.reader
+        first, second, third = FollowGraphTests.authors
+        Follow.objects.create(user=reader, author=third)
+        Follow.objects.create(user=reader, author=first)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(followed_author_ids(reader.pk)),
+                             [first.pk, third.pk])
+            self.assertTrue(is_following(reader.pk, third.pk))
+            self.assertFalse(is_following(reader.pk, second.pk))
+
+        Follow.objects.create(user=reader, author=second)
+        self.assertTrue(is_following(reader.pk, second.pk))
+        Follow.objects.filter(user=reader, author=first).delete()
+        self.assertFalse(is_following(reader.pk, first.pk))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_following(None, first.pk))
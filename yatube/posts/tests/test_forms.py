@@ -1,12 +1,16 @@
+import os
 import shutil
 import tempfile
+from io import StringIO
+from unittest import mock
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from posts.forms import PostForm
-from posts.models import Post, Group
+from posts.models import Post, Group, ThumbnailTask
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
@@ -78,6 +82,34 @@ class PostFormTests(TestCase):
                 image='posts/small.jpeg'
             ).exists()
         )
+        self.assertTrue(
+            ThumbnailTask.objects.filter(image='posts/small.jpeg').exists()
+        )
+        call_command('thumbnail_worker', once=True, processes=0,
+                     stdout=StringIO())
+        self.assertFalse(ThumbnailTask.objects.exists())
+        self.assertTrue(os.path.isdir(os.path.join(TEMP_MEDIA_ROOT, 'cache')))
+
+    def test_failed_thumbnail_task_is_retried(self):
+        """Задача с ошибкой остаётся в очереди, повторяется после
+        --retry-after и перестаёт браться, когда кончились попытки."""
+        task = ThumbnailTask.objects.create(image='posts/broken.jpeg')
+        worker = 'posts.management.commands.thumbnail_worker'
+
+        def run(**options):
+            with mock.patch(f'{worker}.generate_thumbnails',
+                            return_value=False):
+                call_command('thumbnail_worker', once=True, processes=0,
+                             max_attempts=2, stdout=StringIO(),
+                             stderr=StringIO(), **options)
+            task.refresh_from_db()
+            return task.attempts
+
+        self.assertEqual(run(), 1)
+        self.assertIsNotNone(task.locked_at)
+        self.assertEqual(run(), 1)
+        self.assertEqual(run(retry_after=0), 2)
+        self.assertEqual(run(retry_after=0), 2)
 
     def test_post_edit_success(self):
         """Валидная форма изменяет запись в Post."""
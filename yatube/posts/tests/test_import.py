@@ -0,0 +1,126 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+from posts import counters
+from posts.feed import backfill_feeds
+from posts.follow_graph import is_following
+from posts.models import Comment, FeedItem, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ImportContentTests(TransactionTestCase):
+    """Импорт в обход сигналов оставляет ленты, счётчики и кэш страниц
+    согласованными."""
+
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.author = User.objects.create_user(username='HasNoName')
+        self.reader = User.objects.create_user(username='Reader')
+        self.group = Group.objects.create(title='Группа', slug='test-slug',
+                                          description='Описание')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        return path
+
+    def call(self, *args):
+        call_command('import_content', *args, stdout=StringIO())
+
+    def test_import_posts_comments_and_follows(self):
+        """Посты, комментарии и подписки импортируются пачками,
+        с датами из файла и сбросом кэшей."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        self.assertEqual(counters.all_posts_count(), 0)
+        records = (
+            {'id': 100, 'author': 'HasNoName', 'text': 'Импорт',
+             'group': 'test-slug', 'pub_date': '2020-01-02T03:04:05'},
+            {'author': 'Newbie', 'text': 'Новый автор', 'group': 'new'},
+            {'author': 'HasNoName', 'text': ''},
+        )
+        posts = self.write('posts.jsonl', '\n'.join(map(json.dumps, records)))
+        self.call('posts', posts, '--create-missing', '--batch-size', '1')
+
+        post = Post.objects.get(pk=100)
+        self.assertEqual(post.pub_date.isoformat(),
+                         '2020-01-02T03:04:05+00:00')
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(Post.objects.get(text='Новый автор').group.slug,
+                         'new')
+        self.assertEqual(counters.all_posts_count(), 2)
+        self.assertTrue(FeedItem.objects.filter(user=self.reader,
+                                                post=post).exists())
+        self.assertContains(client.get(reverse('posts:index')), 'Импорт')
+
+        comments = self.write(
+            'comments.csv',
+            'post,author,text\n100,Reader,Первый\n100,Reader,Второй\n'
+            '999,Reader,Без поста\n')
+        self.call('comments', comments, '--offset', '1')
+        self.assertEqual(list(Comment.objects.values_list('text', flat=True)),
+                         ['Второй'])
+
+        self.assertFalse(is_following(self.reader.pk, User.objects.get(
+            username='Newbie').pk))
+        follows = self.write('follows.csv',
+                             'user,author\nReader,Newbie\nReader,Reader\n')
+        self.call('follows', follows)
+        newbie = User.objects.get(username='Newbie')
+        self.assertTrue(is_following(self.reader.pk, newbie.pk))
+        self.assertEqual(counters.feed_posts_count(self.reader.pk), 2)
+
+    def test_import_posts_takes_ids_from_database(self):
+        """Посты без id получают id базы, а явный id, уже занятый в
+        базе или раньше в файле, пропускается."""
+        live = Post.objects.create(text='С сайта', author=self.author)
+        records = (
+            {'author': 'HasNoName', 'text': 'Без id'},
+            {'id': live.pk, 'author': 'HasNoName', 'text': 'Занят сайтом'},
+            {'id': live.pk + 1, 'author': 'HasNoName', 'text': 'Занят'},
+            {'id': live.pk + 10, 'author': 'HasNoName', 'text': 'Свой id'},
+        )
+        posts = self.write('posts.jsonl', '\n'.join(map(json.dumps, records)))
+        self.call('posts', posts, '--batch-size', '1')
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'pk')),
+            {'С сайта': live.pk, 'Без id': live.pk + 1,
+             'Свой id': live.pk + 10})
+        self.assertEqual(
+            set(FeedItem.objects.values_list('post_id', flat=True)),
+            {live.pk, live.pk + 1, live.pk + 10})
+        self.assertEqual(Post.objects.create(text='Новый с сайта',
+                                             author=self.author).pk,
+                         live.pk + 11)
+
+    def test_backfill_feeds_fills_only_given_pairs(self):
+        """Лента заполняется по самим парам, а не по всем сочетаниям
+        их читателей и авторов."""
+        other = User.objects.create_user(username='Other')
+        third = User.objects.create_user(username='Third')
+        Follow.objects.create(user=self.reader, author=third)
+        Follow.objects.create(user=other, author=third)
+        Post.objects.create(text='Автор', author=self.author)
+        Post.objects.create(text='Третий', author=third)
+        FeedItem.objects.all().delete()
+        backfill_feeds([(self.reader.pk, self.author.pk),
+                        (other.pk, third.pk)])
+        self.assertEqual(
+            sorted(FeedItem.objects.values_list('user__username',
+                                                'post__text')),
+            [('Other', 'Третий'), ('Reader', 'Автор')])
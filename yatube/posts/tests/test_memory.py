@@ -0,0 +1,95 @@
+import tracemalloc
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from core import memory, metrics
+from posts.models import Group, Post
+
+User = get_user_model()
+
+# Наибольший пик памяти на запрос с холодным кэшем, байты. Примерно
+# вдвое выше замеренного (списки — около 2,7 МБ на страницу в 380 КБ
+# HTML, пост — около 0,3 МБ): тест ловит рост, а не колебания.
+MEMORY_BUDGETS = {
+    'posts:index': 5 * 1024 * 1024,
+    'posts:profile': 5 * 1024 * 1024,
+    'posts:group_list': 5 * 1024 * 1024,
+    'posts:post_details': 640 * 1024,
+}
+
+LONG_TEXT_SIZE = 20 * 1024
+
+
+def busiest(queryset, relation):
+    return queryset.annotate(count=Count(relation)).order_by('-count')[0]
+
+
+class MemoryBudgetTests(TestCase):
+    """Пик памяти страниц со списками постов на заполненной базе, где
+    у самых свежих постов длинный текст."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.started_tracing = memory.start()
+        call_command('seed', users=20, groups=3, posts=300, comments=300,
+                     follows=5, stdout=StringIO())
+        cls.author = busiest(User.objects, 'posts')
+        cls.group = busiest(Group.objects, 'posts')
+        newest = set()
+        for queryset in (Post.objects.all(), cls.author.posts.all(),
+                         cls.group.posts.all()):
+            newest.update(queryset.values_list('pk', flat=True)[:10])
+        long_text = ('Очень длинный пост. ' * LONG_TEXT_SIZE)[:LONG_TEXT_SIZE]
+        Post.objects.filter(pk__in=newest).update(text=long_text)
+        cls.post = busiest(Post.objects.filter(pk__in=newest), 'comments')
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.started_tracing:
+            tracemalloc.stop()
+        super().tearDownClass()
+
+    def peak(self, url):
+        """Пик памяти второго запроса с холодным кэшем: первый
+        загружает модули и компилирует шаблоны."""
+        client = Client()
+        for _ in range(2):
+            cache.clear()
+            with memory.MemoryUsage() as usage:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return usage.peak
+
+    def test_list_views_within_budget(self):
+        urls = {
+            'posts:index': reverse('posts:index'),
+            'posts:profile': reverse('posts:profile',
+                                     args=(self.author.username,)),
+            'posts:group_list': reverse('posts:group_list',
+                                        args=(self.group.slug,)),
+            'posts:post_details': reverse('posts:post_details',
+                                          args=(self.post.pk,)),
+        }
+        for view, url in urls.items():
+            with self.subTest(view=view):
+                peak = self.peak(url)
+                self.assertLessEqual(
+                    peak, MEMORY_BUDGETS[view],
+                    f'{view}: пик {memory.format_bytes(peak)}, бюджет '
+                    f'{memory.format_bytes(MEMORY_BUDGETS[view])}')
+
+    @override_settings(SERVER_TIMING=True)
+    def test_middleware_reports_peak(self):
+        """Под tracemalloc пик памяти попадает в Server-Timing и в
+        метрики представления."""
+        metrics.reset()
+        response = Client().get(reverse('posts:index'))
+        self.assertIn('mem;desc="peak ', response['Server-Timing'])
+        self.assertGreater(metrics.snapshot()['posts:index']['memory_peak'],
+                           0)
@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError
 from django.test import TestCase
-from ..models import Group, Post
+from ..models import Follow, Group, Post
 
 User = get_user_model()
 
@@ -23,3 +24,10 @@ class PostModelTest(TestCase):
     def test_models_have_correct_object_names(self):
         """Проверяем, что у моделей корректно работает __str__."""
         self.assertEqual(PostModelTest.post.__str__(), 'Тестовый пост')
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора запрещена в базе."""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=PostModelTest.user)
+        with self.assertRaises(IntegrityError):
+            Follow.objects.create(user=reader, author=PostModelTest.user)
@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.feed import FEED_CURSOR, feed_posts
+from posts.models import Follow, Post, Group
+from posts.paginators import CursorPaginator, decode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='test-slug',
+            description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Текст поста {i}', author=cls.user, group=cls.group)
+            for i in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_do_not_overlap(self):
+        """Курсорные страницы вместе дают все посты без повторов."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        page = paginator.get_page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.get_page(after=page.next_cursor)
+            seen.extend(page)
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(
+            [post.pk for post in seen],
+            list(Post.objects.order_by('-pub_date', '-pk')
+                 .values_list('pk', flat=True))
+        )
+        self.assertEqual(len(page), 5)
+
+    def test_previous_page(self):
+        """Переход назад возвращает предыдущую страницу."""
+        paginator = CursorPaginator(Post.objects.all(), 10)
+        first = paginator.get_page()
+        second = paginator.get_page(after=first.next_cursor)
+        back = paginator.get_page(before=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def plan(self, page):
+        """План запроса страницы. SQL берётся с параметрами, а не с
+        подставленными значениями: по константам SQLite строит другой
+        план."""
+        queries = []
+
+        def capture(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            list(page)
+        sql, params = queries[-1]
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' | '.join(row[-1] for row in cursor.fetchall())
+
+    def test_next_page_walks_index(self):
+        """Вторая страница, как и первая, читается по индексу (дата, id)
+        без сортировки остатка таблицы или ленты."""
+        reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=reader, author=CursorPaginatorTests.user)
+        cases = {
+            'post_pub_date_idx': CursorPaginator(
+                Post.objects.select_related('author', 'group'), 10),
+            'feed_user_pub_date_post_idx': CursorPaginator(
+                feed_posts(reader).select_related('author', 'group'), 10,
+                **FEED_CURSOR),
+        }
+        for index, paginator in cases.items():
+            with self.subTest(index=index):
+                first = paginator.get_page()
+                plan = self.plan(paginator.get_page(after=first.next_cursor))
+                self.assertIn(f'INDEX {index}', plan)
+                self.assertNotIn('MULTI-INDEX OR', plan)
+                self.assertNotIn('TEMP B-TREE FOR ORDER BY', plan)
+
+    def test_broken_cursor_returns_first_page(self):
+        """Испорченный курсор не ломает страницу."""
+        self.assertIsNone(decode_cursor('не курсор'))
+        page = CursorPaginator(Post.objects.all(), 10).get_page(after='xx')
+        self.assertFalse(page.has_previous())
+        self.assertEqual(len(page), 10)
+
+    @override_settings(POSTS_CURSOR_PAGINATION=True)
+    def test_views_render_cursor_links(self):
+        """В курсорном режиме списки выводят ссылки «вперёд»."""
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+        )
+        client = Client()
+        for url in pages:
+            with self.subTest(url=url):
+                response = client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertEqual(len(page_obj), 10)
+                self.assertContains(
+                    response, f'?after={page_obj.next_cursor}')
+                response = client.get(url, {'after': page_obj.next_cursor})
+                self.assertEqual(len(response.context['page_obj']), 10)
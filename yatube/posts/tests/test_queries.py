@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+PAGE_SIZE = 10
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов представлений не зависит от размера страницы
+    и от картинок в постах."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа',
+            slug='test-slug',
+            description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.post = Post.objects.create(
+            text='Текст поста',
+            author=cls.user,
+            group=cls.group,
+            image='posts/small.gif',
+            thumbnails_ready=True,
+        )
+        Comment.objects.create(
+            post=cls.post,
+            author=cls.reader,
+            text='Комментарий',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(QueryBudgetTests.reader)
+
+    def count_queries(self, client, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def fill_pages(self):
+        for i in range(PAGE_SIZE + 5):
+            author = User.objects.create_user(username=f'author{i}')
+            Follow.objects.create(user=QueryBudgetTests.reader, author=author)
+            Post.objects.create(text=f'Пост {i}', author=author,
+                                group=QueryBudgetTests.group,
+                                image=f'posts/{i}.gif',
+                                thumbnails_ready=i % 2 == 0)
+            Post.objects.create(text=f'Пост автора {i}',
+                                author=QueryBudgetTests.user,
+                                group=QueryBudgetTests.group,
+                                image=f'posts/author{i}.gif',
+                                thumbnails_ready=True)
+            Comment.objects.create(post=QueryBudgetTests.post, author=author,
+                                   text=f'Комментарий {i}')
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        """Заполненная страница стоит столько же запросов, сколько
+        страница с одной записью, и укладывается в бюджет."""
+        post_id = QueryBudgetTests.post.pk
+        pages = (
+            (self.guest_client, reverse('posts:index'), 3),
+            (self.guest_client,
+             reverse('posts:group_list', kwargs={'slug': 'test-slug'}), 4),
+            (self.guest_client,
+             reverse('posts:profile', kwargs={'username': 'HasNoName'}), 4),
+            (self.guest_client,
+             reverse('posts:post_details', kwargs={'post_id': post_id}), 4),
+            (self.reader_client, reverse('posts:index'), 5),
+            (self.reader_client, reverse('posts:follow_index'), 4),
+            (self.reader_client,
+             reverse('posts:profile', kwargs={'username': 'HasNoName'}), 7),
+            (self.reader_client,
+             reverse('posts:post_details', kwargs={'post_id': post_id}), 6),
+        )
+        small = [self.count_queries(client, url) for client, url, _ in pages]
+        self.fill_pages()
+        for (client, url, budget), expected in zip(pages, small):
+            with self.subTest(url=url,
+                              guest=client is self.guest_client):
+                queries = self.count_queries(client, url)
+                self.assertEqual(queries, expected)
+                self.assertLessEqual(queries, budget)
+
+    def test_not_modified_costs_one_query(self):
+        """Ответ 304 стоит одного агрегатного запроса."""
+        url = reverse('posts:post_details',
+                      kwargs={'post_id': QueryBudgetTests.post.pk})
+        etag = self.guest_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(context), 1)
+
+    def test_cached_post_list_skips_list_query(self):
+        """Список постов, закэшированный для гостя, достаётся
+        авторизованному пользователю без запроса постов — и в обычной,
+        и в курсорной пагинации."""
+        url = reverse('posts:profile', kwargs={'username': 'HasNoName'})
+        for cursor in (False, True):
+            with self.subTest(cursor=cursor), \
+                    self.settings(POSTS_CURSOR_PAGINATION=cursor):
+                cache.clear()
+                self.guest_client.get(url)
+                with CaptureQueriesContext(connection) as context:
+                    response = self.reader_client.get(url)
+                self.assertContains(response, 'Отписаться')
+                list_queries = [query['sql'] for query in context
+                                if 'FROM "posts_post"' in query['sql']
+                                and 'LIMIT' in query['sql']]
+                self.assertEqual(list_queries, [])
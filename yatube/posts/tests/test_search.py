@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post
+from posts.search import search_posts
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.relevant = Post.objects.create(
+            text='Котики, котики и ещё раз котики', author=cls.user)
+        cls.mention = Post.objects.create(
+            text='Котики против собак и длинный рассказ о погоде, '
+                 'соседях, работе и прочих важных делах',
+            author=cls.user)
+        cls.other = Post.objects.create(text='Про собак', author=cls.user)
+
+    def test_search_ranks_matches(self):
+        """Поиск находит посты без учёта регистра и сортирует
+        по релевантности."""
+        page = search_posts('КОТИКИ', 10)
+        self.assertEqual(list(page),
+                         [SearchTests.relevant, SearchTests.mention])
+        self.assertFalse(page.has_next())
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при создании, изменении и удалении постов,
+        в том числе в обход сигналов."""
+        Post.objects.filter(pk=SearchTests.other.pk).update(
+            text='Про енотов')
+        self.assertEqual(list(search_posts('енотов', 10)),
+                         [SearchTests.other])
+        self.assertEqual(list(search_posts('собак', 10)),
+                         [SearchTests.mention])
+        Post.objects.get(pk=SearchTests.relevant.pk).delete()
+        self.assertEqual(list(search_posts('котики', 10)),
+                         [SearchTests.mention])
+
+    def test_search_keyset_pages(self):
+        """Результаты листаются курсором без повторов."""
+        Post.objects.bulk_create(
+            Post(text=f'Тема номер {i}', author=SearchTests.user)
+            for i in range(15)
+        )
+        first = search_posts('тема', 10)
+        second = search_posts('тема', 10, after=first.next_cursor)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 5)
+        self.assertFalse(set(first) & set(second))
+
+    def test_search_view_and_admin(self):
+        """Страница поиска и поиск в админке используют индекс
+        и не падают на спецсимволах FTS5."""
+        client = Client()
+        response = client.get(reverse('posts:search'), {'q': 'собак'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [SearchTests.other, SearchTests.mention])
+        response = client.get(reverse('posts:search'), {'q': '"OR* (NEAR'})
+        self.assertEqual(response.status_code, 200)
+        client.force_login(SearchTests.admin)
+        response = client.get(reverse('admin:posts_post_changelist'),
+                              {'q': 'котики'})
+        self.assertEqual(response.context['cl'].result_count, 2)
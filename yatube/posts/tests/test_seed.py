@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import Count, F, Min
+from django.test import TestCase, override_settings
+from posts.models import (Comment, FeedItem, Follow, Group, Post,
+                          ThumbnailTask)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SeedTests(TestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def seed(self):
+        """Данные запуска без абсолютных id и дат, зависящих от базы
+        и текущего времени."""
+        call_command('seed', users=30, groups=3, posts=300, comments=200,
+                     follows=5, stdout=StringIO())
+        first = User.objects.aggregate(first=Min('id'))['first']
+        return (
+            [(text, author_id - first) for text, author_id in
+             Post.objects.order_by('pk').values_list('text', 'author_id')],
+            list(Comment.objects.order_by('pk').values_list('text',
+                                                            flat=True)),
+            sorted((user_id - first, author_id - first) for user_id, author_id
+                   in Follow.objects.values_list('user_id', 'author_id')),
+        )
+
+    def test_seed_is_deterministic(self):
+        """Один и тот же --seed даёт одинаковые данные."""
+        first = self.seed()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertEqual(first, self.seed())
+        self.assertEqual(len(first[0]), 300)
+        self.assertEqual(len(first[1]), 200)
+
+    def test_seed_keeps_data_consistent(self):
+        """Комментарии пишутся после поста, ленты заполнены, авторы
+        распределены неравномерно."""
+        follows = self.seed()[2]
+        self.assertFalse(Comment.objects.filter(
+            created__lt=F('post__pub_date')).exists())
+        self.assertTrue(follows)
+        self.assertTrue(all(user != author for user, author in follows))
+        self.assertEqual(
+            FeedItem.objects.count(),
+            Post.objects.filter(author__following__isnull=False).count())
+        busiest = User.objects.annotate(
+            count=Count('posts')).order_by('-count')[0]
+        self.assertGreater(busiest.count, 300 / 30 * 3)
+
+    def test_aborted_seed_removes_images(self):
+        """Если заполнение прервалось, откатываются не только строки, но
+        и файлы созданных изображений."""
+        with mock.patch(
+                'posts.management.commands.seed.Command.seed_posts',
+                side_effect=RuntimeError('прервано')):
+            with self.assertRaises(RuntimeError):
+                call_command('seed', users=3, groups=1, posts=5, comments=0,
+                             follows=1, images=2, stdout=StringIO())
+        self.assertFalse(ThumbnailTask.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(TEMP_MEDIA_ROOT, 'posts')),
+                         [])
@@ -1,14 +1,21 @@
 import shutil
 import tempfile
 from http import HTTPStatus
+from io import StringIO
 from django import forms
 from django.test import TestCase, Client, override_settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.urls import reverse
 from django.conf import settings
 from django.core.cache import cache
-from posts.models import Post, Group, Comment, Follow
+from django.utils import timezone
+from posts.caching import bump_page_versions, index_scope
+from posts.feed import backfill_feed, feed_posts
+from posts.models import Post, Group, Comment, FeedItem, Follow
+from posts.thumbnails import POST_IMAGE_WIDTHS, enqueue_thumbnails
+from posts.views import COUNT_COMMENTS
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 User = get_user_model()
@@ -127,6 +134,44 @@ class PostPagesTests(TestCase):
         posts = PostPagesTests.user.posts.all()
         self.assertQuerysetEqual(page_obj, posts, lambda x: x)
 
+    def test_follow_feed_is_filled_and_trimmed(self):
+        """Новые посты попадают в ленту подписчика, а после отписки
+        посты автора из ленты пропадают."""
+        follow = Follow.objects.create(
+            user=self.follower,
+            author=PostPagesTests.user
+        )
+        new_post = Post.objects.create(
+            text='Пост после подписки',
+            author=PostPagesTests.user,
+        )
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertIn(new_post, response.context['page_obj'])
+        self.assertEqual(
+            self.follower.feed.count(),
+            PostPagesTests.user.posts.count()
+        )
+        follow.delete()
+        response = self.follower_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 0)
+        self.assertFalse(self.follower.feed.exists())
+
+    def test_follow_feed_orders_same_date_by_id(self):
+        """Посты ленты с одинаковой датой идут по убыванию id."""
+        Follow.objects.create(user=self.follower, author=PostPagesTests.user)
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=PostPagesTests.user)
+            for number in range(3)
+        )
+        FeedItem.objects.all().delete()
+        backfill_feed(self.follower.pk, PostPagesTests.user.pk)
+        FeedItem.objects.update(pub_date=timezone.now())
+        ids = list(PostPagesTests.user.posts.values_list('pk', flat=True))
+        self.assertEqual(
+            list(feed_posts(self.follower).values_list('pk', flat=True)),
+            sorted(ids, reverse=True)
+        )
+
     def test_user_can_follow_and_unfollow(self):
         """Авторизованный пользователь может подписываться на других
         пользователей и удалять их из подписок."""
@@ -235,22 +280,225 @@ class PostPagesTests(TestCase):
         comments = PostPagesTests.post.comments.all()
         self.assertQuerysetEqual(comments_context, comments, lambda x: x)
 
+    def test_post_comments_are_paginated(self):
+        """Страница поста выводит первую порцию комментариев,
+        остальные подгружаются фрагментами по курсору."""
+        Comment.objects.bulk_create(
+            Comment(post=PostPagesTests.post, author=self.follower,
+                    text=f'Комментарий {i}')
+            for i in range(COUNT_COMMENTS + 4)
+        )
+        response = self.guest_client.get(
+            reverse('posts:post_details',
+                    kwargs={'post_id': PostPagesTests.post.pk}))
+        first = response.context['comments']
+        self.assertEqual(len(first), COUNT_COMMENTS)
+        self.assertEqual(first[0], PostPagesTests.comment)
+        self.assertTrue(first.has_next())
+        response = self.guest_client.get(
+            reverse('posts:post_comments',
+                    kwargs={'post_id': PostPagesTests.post.pk}),
+            {'after': first.next_cursor})
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        rest = response.context['comments']
+        self.assertEqual(len(rest), 5)
+        self.assertFalse(rest.has_next())
+        self.assertFalse(set(first) & set(rest))
+
     def test_cache_index_page(self):
+        """Главная страница берётся из кэша, пока посты не менялись,
+        и сбрасывается при создании и удалении поста."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        posts = response.content
+        Post.objects.bulk_create([Post(
+            text='Пост в обход сигналов',
+            author=PostPagesTests.user,
+        )])
+        response_cached = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response_cached.content, posts)
         new_post = Post.objects.create(
-            text='Текст поста',
+            text='Текст нового поста',
             author=PostPagesTests.user,
             group=PostPagesTests.group,
         )
-        response = self.authorized_client.get(reverse('posts:index'))
-        posts = response.content
+        response_created = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response_created, 'Текст нового поста')
         new_post.delete()
-        response_first = self.authorized_client.get(reverse('posts:index'))
-        posts_first = response_first.content
-        self.assertEqual(posts_first, posts)
-        cache.clear()
-        response_second = self.authorized_client.get(reverse('posts:index'))
-        posts_second = response_second.content
-        self.assertNotEqual(posts_first, posts_second)
+        response_deleted = self.authorized_client.get(reverse('posts:index'))
+        self.assertNotContains(response_deleted, 'Текст нового поста')
+
+    def test_cache_group_and_profile_pages(self):
+        """Страницы группы и профиля сбрасываются при изменении поста."""
+        pages = (
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+        )
+        for url in pages:
+            self.guest_client.get(url)
+        post = Post.objects.get(pk=PostPagesTests.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        for url in pages:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Исправленный текст')
+
+    def test_post_card_fragment_cache(self):
+        """Карточка поста берётся из кэша фрагментов и обновляется
+        после редактирования поста."""
+        self.guest_client.get(reverse('posts:index'))
+        Post.objects.filter(pk=PostPagesTests.post.pk).update(
+            text='Текст в обход сохранения')
+        bump_page_versions(index_scope())
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Текст в обход сохранения')
+        post = Post.objects.get(pk=PostPagesTests.post.pk)
+        post.text = 'Отредактированный текст'
+        post.save()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Отредактированный текст')
+
+    def test_author_rename_refreshes_cached_pages(self):
+        """Новое имя автора сразу видно в закэшированных списках и на
+        странице поста, проверенной по ETag."""
+        post_url = reverse('posts:post_details',
+                           kwargs={'post_id': PostPagesTests.post.pk})
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+        )
+        for url in pages:
+            self.guest_client.get(url)
+        etag = self.guest_client.get(post_url)['ETag']
+        user = User.objects.get(pk=PostPagesTests.user.pk)
+        user.first_name, user.last_name = 'Лев', 'Толстой'
+        user.save()
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url), 'Лев Толстой')
+        response = self.guest_client.get(post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Лев Толстой')
+
+    def test_post_list_cache_is_shared_between_users(self):
+        """Список постов кэшируется один раз для всех пользователей,
+        а шапка и кнопка подписки рендерятся для каждого."""
+        url = reverse('posts:profile', kwargs={'username': 'HasNoName'})
+        self.guest_client.get(url)
+        Post.objects.bulk_create([Post(
+            text='Пост в обход сигналов',
+            author=PostPagesTests.user,
+        )])
+        Follow.objects.create(user=self.follower, author=PostPagesTests.user)
+        clients = (
+            (self.second_client, 'secondUser', 'Подписаться'),
+            (self.follower_client, 'Follower', 'Отписаться'),
+        )
+        for client, username, button in clients:
+            with self.subTest(username=username):
+                response = client.get(url)
+                self.assertNotContains(response, 'Пост в обход сигналов')
+                self.assertContains(response, f'Пользователь: {username}')
+                self.assertContains(response, button)
+
+    def test_pages_answer_not_modified(self):
+        """Неизменившиеся страницы отдают 304 по ETag, а новый
+        комментарий, пост или другой пользователь — полную страницу."""
+        post_id = PostPagesTests.post.pk
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'HasNoName'}),
+            reverse('posts:post_details', kwargs={'post_id': post_id}),
+        )
+        etags = {}
+        for url in pages:
+            response = self.guest_client.get(url)
+            self.assertIn('Last-Modified', response)
+            self.assertIn('max-age=0', response['Cache-Control'])
+            etags[url] = response['ETag']
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code,
+                                 HTTPStatus.NOT_MODIFIED)
+                self.assertEqual(response.content, b'')
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        Comment.objects.create(post=PostPagesTests.post,
+                               text='Новый комментарий',
+                               author=self.follower)
+        response = self.guest_client.get(
+            pages[-1], HTTP_IF_NONE_MATCH=etags[pages[-1]])
+        self.assertContains(response, 'Новый комментарий')
+
+        Post.objects.create(text='Новый пост', author=PostPagesTests.user,
+                            group=PostPagesTests.group)
+        for url in pages[:-1]:
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url])
+                self.assertContains(response, 'Новый пост')
+
+    def test_deleted_post_ignores_if_modified_since(self):
+        """После удаления поста Max('updated') не меняется, но страница
+        по одному If-Modified-Since не отдаётся как 304."""
+        old_post = Post.objects.create(text='Удаляемый пост',
+                                       author=PostPagesTests.user)
+        url = reverse('posts:index')
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        old_post.delete()
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, 'Удаляемый пост')
+
+    def test_deleted_comment_changes_etag(self):
+        """Удаление старого комментария и импорт комментария со старой
+        датой меняют ETag страницы поста."""
+        url = reverse('posts:post_details',
+                      kwargs={'post_id': PostPagesTests.post.pk})
+        Comment.objects.create(post=PostPagesTests.post, text='Новее',
+                               author=self.follower)
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.filter(pk=PostPagesTests.comment.pk).delete()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, 'текст комментария')
+
+        etag = response['ETag']
+        Comment.objects.bulk_create([Comment(
+            post=PostPagesTests.post, text='Из импорта',
+            author=self.follower)])
+        Comment.objects.filter(text='Из импорта').update(
+            created=PostPagesTests.post.pub_date)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Из импорта')
+
+    def test_post_image_is_responsive(self):
+        """Пока воркер не построил миниатюры, выводится исходная картинка;
+        после — srcset по всем ширинам с ленивой загрузкой."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_details',
+                    kwargs={'post_id': PostPagesTests.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url, ready=False):
+                response = self.guest_client.get(url)
+                self.assertContains(
+                    response, f'src="{PostPagesTests.post.image.url}"')
+                self.assertNotContains(response, 'srcset')
+        enqueue_thumbnails(PostPagesTests.post.image)
+        call_command('thumbnail_worker', once=True, processes=0,
+                     stdout=StringIO())
+        for url in urls:
+            with self.subTest(url=url, ready=True):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'loading="lazy"')
+                for width in POST_IMAGE_WIDTHS:
+                    self.assertContains(response, f' {width}w')
 
     def test_post_create_not_authorized(self):
         post_count = Post.objects.count()
@@ -0,0 +1,134 @@
+import logging
+import time
+from collections import namedtuple
+
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics_store
+
+from .models import Post, ThumbnailTask
+
+logger = logging.getLogger(__name__)
+
+POST_IMAGE_SIZE = (960, 339)
+POST_IMAGE_WIDTHS = (480, 768, 960)
+POST_IMAGE_SIZES = '(max-width: 960px) 100vw, 960px'
+# WebP строится, только если Pillow собран с libwebp.
+POST_IMAGE_FORMATS = (
+    ('JPEG', 'WEBP') if features.check('webp') else ('JPEG',)
+)
+
+
+Thumbnail = namedtuple('Thumbnail', 'url width height')
+
+
+def image_height(width):
+    full_width, full_height = POST_IMAGE_SIZE
+    return round(width * full_height / full_width)
+
+
+def image_geometry(width):
+    return f'{width}x{image_height(width)}'
+
+
+def image_options(image_format):
+    return {'crop': 'center', 'upscale': True, 'format': image_format}
+
+
+# Все варианты {% responsive_image %}: каждая ширина в каждом формате.
+POST_THUMBNAILS = tuple(
+    (image_geometry(width), image_options(image_format))
+    for image_format in POST_IMAGE_FORMATS
+    for width in POST_IMAGE_WIDTHS
+)
+
+
+def enqueue_thumbnails(image):
+    """Ставит изображение в очередь воркера thumbnail_worker."""
+    if image:
+        ThumbnailTask.objects.create(image=image.name)
+
+
+def mark_ready(names):
+    """Отмечает посты с изображениями names: миниатюры готовы.
+
+    Посты пересохраняются: новая дата изменения меняет ключ кэша
+    карточки, а сигнал сохранения сбрасывает закэшированные списки, так
+    что исходное изображение, выведенное до постройки миниатюр,
+    сменится на srcset.
+    """
+    posts = Post.objects.filter(
+        image__in=names, thumbnails_ready=False
+    ).select_related('author', 'group')
+    for post in posts:
+        post.thumbnails_ready = True
+        post.save(update_fields=['thumbnails_ready', 'updated'])
+
+
+def thumbnail_name(image, geometry, options):
+    """Имя файла миниатюры в хранилище.
+
+    Считается так же, как в ThumbnailBackend.get_thumbnail, но без
+    обращения к kvstore и к самому файлу.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return backend._get_thumbnail_filename(source, geometry, options)
+
+
+def image_variants(image):
+    """Миниатюры изображения по форматам: {'JPEG': [Thumbnail, ...]},
+    от узких к широким.
+
+    Вызывается только для постов с thumbnails_ready и не делает ни
+    одного запроса: имена миниатюр вычисляются, а размер при обрезке по
+    центру с увеличением всегда равен заданной геометрии.
+    """
+    variants = {}
+    for image_format in POST_IMAGE_FORMATS:
+        options = image_options(image_format)
+        variants[image_format] = [
+            Thumbnail(
+                url=default.storage.url(
+                    thumbnail_name(image, image_geometry(width), options)),
+                width=width,
+                height=image_height(width),
+            )
+            for width in POST_IMAGE_WIDTHS
+        ]
+    return variants
+
+
+def generate_thumbnails(name):
+    """Строит все миниатюры изображения; True, если все файлы на месте.
+
+    Время уходит в метрики сразу: функция выполняется в процессах пула
+    воркера, которые не успеют сбросить их сами.
+    """
+    started = time.perf_counter()
+    try:
+        for geometry, options in POST_THUMBNAILS:
+            # Нечитаемый исходник sorl не считает ошибкой и возвращает
+            # миниатюру без файла.
+            if not get_thumbnail(name, geometry, **options).exists():
+                raise FileNotFoundError(f'{name} {geometry}')
+    except Exception:
+        logger.exception('Не удалось построить миниатюры для %s', name)
+        return False
+    metrics_store.observe('yatube_upload_processing_seconds',
+                          time.perf_counter() - started, stage='thumbnails')
+    metrics_store.flush_if_due(0)
+    return True
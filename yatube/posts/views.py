@@ -1,83 +1,140 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from .caching import group_scope, index_scope, page_cache_key, profile_scope
+from .conditional import (conditional_page, group_validators,
+                          index_validators, post_validators,
+                          profile_validators)
+from .counters import (all_posts_count, author_posts_count,
+                       feed_posts_count, group_posts_count)
+from .feed import FEED_CURSOR, feed_posts
+from .follow_graph import is_following
 from .forms import PostForm, CommentForm
-from .models import Post, Group, Follow
+from .models import Comment, Post, Group, Follow
+from .paginators import CountedPaginator, CursorPaginator
+from .search import search_posts
+from .thumbnails import enqueue_thumbnails
 
 User = get_user_model()
 
 COUNT_POST = 10
+COUNT_COMMENTS = 20
 TITLE_LENGTH = 30
 
 
-def paginate(request, posts):
-    paginator = Paginator(posts, COUNT_POST)
+def paginate(request, posts, count=None, cursor=None, **ordering):
+    """Страница списка постов; count — функция, возвращающая их число,
+    нужна только обычной пагинации, ordering — порядок курсорной (см.
+    CursorPaginator)."""
+    if cursor is None:
+        cursor = settings.POSTS_CURSOR_PAGINATION
+    if cursor:
+        paginator = CursorPaginator(posts, COUNT_POST, **ordering)
+        return paginator.get_page(after=request.GET.get('after'),
+                                  before=request.GET.get('before'))
+    paginator = CountedPaginator(posts, COUNT_POST, count=count)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-@cache_page(20, key_prefix='index_page')
+def paginate_comments(request, post_id):
+    comments = Comment.objects.filter(
+        post_id=post_id
+    ).select_related('author')
+    paginator = CursorPaginator(comments, COUNT_COMMENTS, ordering='created')
+    return paginator.get_page(after=request.GET.get('after'))
+
+
+@conditional_page(index_validators)
 def index(request):
-    post_list = Post.objects.select_related('group').all()
-    page_obj = paginate(request, post_list)
+    post_list = Post.objects.select_related('author', 'group')
+    page_obj = paginate(request, post_list, all_posts_count)
     context = {
         'page_obj': page_obj,
+        'page_cache_key': page_cache_key(index_scope(), request),
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional_page(group_validators)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginate(request, posts)
+    posts = group.posts.select_related('author', 'group')
+    page_obj = paginate(request, posts,
+                        partial(group_posts_count, group.pk))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'page_cache_key': page_cache_key(group_scope(slug), request),
         'title': f'Записи сообщества {group}',
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional_page(profile_validators)
 def profile(request, username):
     template = 'posts/profile.html'
     user = get_object_or_404(User, username=username)
-    posts = user.posts.all()
-    page_obj = paginate(request, posts)
+    posts = user.posts.select_related('author', 'group')
+    count = author_posts_count(user.pk)
+    page_obj = paginate(request, posts, lambda: count)
 
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=user
-        ).exists()
+    following = is_following(request.user.pk, user.pk)
 
     context = {
         'author': user,
-        'count': posts.count(),
+        'count': count,
         'page_obj': page_obj,
+        'page_cache_key': page_cache_key(profile_scope(username), request),
         'following': following
     }
     return render(request, template, context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = search_posts(query, COUNT_POST,
+                                after=request.GET.get('after'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(post_validators)
 def post_details(request, post_id):
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id)
     form = CommentForm()
-    comments = post.comments.all()
+    comments = paginate_comments(request, post_id)
 
     context = {
         'id': post_id,
         'post': post,
         'title': post.text[:TITLE_LENGTH],
+        'author_posts_count': author_posts_count(post.author_id),
         'form': form,
         'comments': comments
     }
     return render(request, template, context)
 
 
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': paginate_comments(request, post_id),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -86,6 +143,7 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        enqueue_thumbnails(post.image)
         return redirect('posts:profile', request.user)
 
     return render(request, 'posts/create_post.html', {'form': form})
@@ -95,7 +153,7 @@ def post_create(request):
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
 
-    if post.author != request.user:
+    if post.author_id != request.user.pk:
         return redirect('posts:post_details', post_id)
 
     if request.method == 'POST':
@@ -104,7 +162,12 @@ def post_edit(request, post_id):
             files=request.FILES or None,
             instance=post)
         if form.is_valid():
-            form.save()
+            post = form.save(commit=False)
+            if 'image' in form.changed_data:
+                post.thumbnails_ready = False
+            post.save()
+            if 'image' in form.changed_data:
+                enqueue_thumbnails(post.image)
             return redirect('posts:post_details', post_id)
         else:
             context = {
@@ -135,9 +198,10 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_ids = request.user.follower.values_list('author__posts', flat=True)
-    post_list = Post.objects.filter(id__in=post_ids)
-    page_obj = paginate(request, post_list)
+    post_list = feed_posts(request.user).select_related('author', 'group')
+    page_obj = paginate(request, post_list,
+                        partial(feed_posts_count, request.user.pk),
+                        **FEED_CURSOR)
     context = {
         'page_obj': page_obj,
     }
@@ -49,11 +49,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -144,8 +146,95 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Общий для всех процессов кэш в файле SQLite вместо LocMemCache:
+# страницы, счётчики и их сброс видны каждому воркеру сервера.
+# Включается переменной окружения YATUBE_SHARED_CACHE=1.
+SHARED_CACHE = os.environ.get('YATUBE_SHARED_CACHE', '').lower() in (
+    '1', 'true', 'yes', 'on')
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+if SHARED_CACHE:
+    CACHES['default'] = {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+
+# Заголовок Server-Timing со временем SQL, шаблонов и кэша в ответах.
+# Раскрывает внутренние подробности, поэтому только для отладки.
+SERVER_TIMING = DEBUG
+
+# Общее для процессов хранилище метрик для страницы /metrics/. Тесты
+# пишут во временный файл: manage.py test — см. core.test_runner,
+# py.test — conftest.py в корне репозитория или YATUBE_METRICS_STORE.
+METRICS_STORE = (os.environ.get('YATUBE_METRICS_STORE')
+                 or os.path.join(BASE_DIR, 'metrics.sqlite3'))
+# Как часто процесс переносит свои метрики в хранилище, с.
+METRICS_FLUSH_INTERVAL = 1.0
+# Сколько запрос ждёт занятое хранилище, прежде чем отложить сброс, с.
+METRICS_FLUSH_TIMEOUT = 0.05
+# Токен для /metrics/ без входа (Prometheus: Authorization: Bearer
+# <токен>); без него страница доступна только сотрудникам.
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+# Области кэша по префиксам ключей для попаданий и промахов.
+METRICS_CACHE_AREAS = (
+    ('template.cache.post_list.', 'post_list'),
+    ('sorl-thumbnail', 'thumbnails'),
+    ('posts:page_version:', 'page_versions'),
+    ('posts:count:', 'counters'),
+    ('posts:follows:', 'follow_graph'),
+)
+
+# Профилирование запросов cProfile, профили — на /admin/profiles/.
+# Доля случайных запросов под профилировщиком; 0 — только по заголовку
+# X-Profile или ?profile=1 сотрудника.
+PROFILER_SAMPLE_RATE = 0.0
+PROFILER_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILER_MAX_FILES = 200
+# Сколько секунд действует подписанное значение заголовка X-Profile.
+PROFILER_TOKEN_MAX_AGE = 24 * 3600
+
+# Пик памяти каждого запроса по tracemalloc: в Server-Timing и метрике
+# yatube_request_memory_peak_bytes. Заметно замедляет процесс.
+MEMORY_PROFILING = False
+# Глубина стека, которую tracemalloc запоминает для каждого выделения.
+MEMORY_TRACE_FRAMES = 1
+
+# Журнал SQL-запросов дольше стольких секунд с планом EXPLAIN QUERY PLAN,
+# например YATUBE_SLOW_QUERY_THRESHOLD=0.1; по умолчанию выключен.
+# Сводка: manage.py slow_queries.
+SLOW_QUERY_THRESHOLD = (
+    float(os.environ['YATUBE_SLOW_QUERY_THRESHOLD'])
+    if os.environ.get('YATUBE_SLOW_QUERY_THRESHOLD') else None)
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+# Курсорная пагинация списков постов вместо постраничной (без COUNT/OFFSET)
+POSTS_CURSOR_PAGINATION = False